@@ -1,14 +1,43 @@
+import time
+_import_started = time.perf_counter()
+
 from flask import Flask
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 from app.extensions import db, login_manager, mail
-from app.models import User
+from app.identity_cache import identity_cache
+from app import startup
+
+startup.record('import', time.perf_counter() - _import_started)
+
 
-def create_app():
+def start_background_services(app):
+    """
+    Threads every worker needs. create_app starts them itself unless
+    PRELOAD is set; then gunicorn.conf.py calls this after the fork, since
+    threads started in the gunicorn master do not survive into workers.
+    """
+    from app.outbox import outbox_sender
+    from app.maintenance import maintenance
+    if app.config.get('OUTBOX_AUTOSTART', True):
+        outbox_sender.start()
+    if app.config.get('MAINTENANCE_AUTOSTART', True):
+        maintenance.start()
+
+
+def create_app(config_class=Config):
+    factory_started = time.perf_counter()
     app = Flask(__name__, template_folder='../templates', static_folder='../static')
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
+    if app.config.get('TRUSTED_PROXY_HOPS'):
+        # Behind the router every request comes from its address; per-IP rate limits need the client's
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_HOPS'])
 
     # Initialize extensions
     db.init_app(app)
+    from app import sqlite_profile
+    sqlite_profile.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
 
@@ -16,7 +45,7 @@ def create_app():
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return identity_cache.get(int(user_id))
 
     # Register Blueprints
     from app.routes.auth_routes import auth_bp
@@ -27,10 +56,43 @@ def create_app():
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(user_bp)
 
+    # Schema and seed data are set up by `flask init-db`, not on every boot
+    if app.config.get('AUTO_INIT_DB'):
+        from app.migrations import init_db
+        with app.app_context():
+            init_db()
+
+    # Build the seat catalog now, before gunicorn's preload fork, so workers
+    # share it copy-on-write and no first booker pays for it. Before
+    # `flask init-db` has run there is no seat table; get_seat_catalog()
+    # then builds it on first use.
+    from app.seat_catalog import load_seat_catalog
     with app.app_context():
-        db.create_all()
-        from seat_seeder import seed_seats_if_empty  # Since it's in project root
-        seed_seats_if_empty()
+        try:
+            load_seat_catalog()
+        except SQLAlchemyError:
+            db.session.rollback()
+
+    from app.outbox import outbox_sender
+    outbox_sender.init_app(app)
+    from app.seat_events import seat_events
+    seat_events.init_app(app)
+    from app.seat_holds import hold_sweeper
+    hold_sweeper.init_app(app)
+    from app.admission import admission_queue
+    admission_queue.init_app(app)
+    from app.rate_limit import rate_limiter
+    rate_limiter.init_app(app)
+    from app.maintenance import maintenance
+    maintenance.init_app(app)
+
+    from app import query_counter, metrics, cli
+    query_counter.init_app(app)
+    metrics.init_app(app)
+    cli.init_app(app)
+
+    if not app.config.get('PRELOAD'):
+        start_background_services(app)
 
     @app.get("/health")
     def health():
@@ -39,7 +101,7 @@ def create_app():
     def index():
         return "Sandhika is running. Go to /login."
 
-
-
+    startup.record('create_app', time.perf_counter() - factory_started)
+    startup.init_app(app)
     return app
 
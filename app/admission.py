@@ -0,0 +1,152 @@
+import math
+import time
+from functools import wraps
+
+from flask import current_app, jsonify, request, session
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from app.local_store import LocalStore
+
+# Virtual waiting room for booking surges. Every (user, showtime) gets one
+# ordered ticket from a LocalStore file shared by the gunicorn workers on
+# this host; ticket n is admitted at opened_at + n / ADMISSION_RATE. The
+# signed token carries the ticket and opened_at, so working out someone's
+# position later is arithmetic on the token and touches no database.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS admission_queue (
+    showtime_id INTEGER PRIMARY KEY,
+    next_ticket INTEGER NOT NULL,
+    opened_at REAL NOT NULL
+)
+"""
+
+
+class AdmissionTicket:
+    __slots__ = ('showtime_id', 'user_id', 'ticket', 'opened_at')
+
+    def __init__(self, showtime_id, user_id, ticket, opened_at):
+        self.showtime_id = showtime_id
+        self.user_id = user_id
+        self.ticket = ticket
+        self.opened_at = opened_at
+
+    def admit_at(self, rate):
+        return self.opened_at + self.ticket / rate
+
+    def position(self, rate, now=None):
+        """People still ahead of this ticket; 0 once admitted."""
+        admitted = math.floor(max(0.0, (now or time.time()) - self.opened_at) * rate)
+        return max(0, self.ticket - admitted)
+
+
+class AdmissionQueue:
+    def __init__(self):
+        self.store = LocalStore('ADMISSION_STORE', 'admission.db', _SCHEMA)
+
+    def init_app(self, app):
+        rate = app.config.get('ADMISSION_RATE', 5.0)
+        # Positions and admit times divide by it
+        if not (isinstance(rate, (int, float)) and math.isfinite(rate) and rate > 0):
+            raise ValueError(f"ADMISSION_RATE must be a positive number of bookers per second, got {rate!r}")
+        self.store.init_app(app)
+        app.extensions['admission_queue'] = self
+
+    def issue(self, showtime_id, user_id, rate):
+        """
+        Next ticket for the showtime. When the queue has drained (everyone
+        issued so far is already admitted) the ticket is admitted at once.
+        """
+        now = time.time()
+        with self.store.transaction() as conn:
+            row = conn.execute("SELECT next_ticket, opened_at FROM admission_queue WHERE showtime_id = ?",
+                               (showtime_id,)).fetchone()
+            if row is None:
+                next_ticket, opened_at = 0, now
+                conn.execute("INSERT INTO admission_queue (showtime_id, next_ticket, opened_at) VALUES (?, 1, ?)",
+                             (showtime_id, now))
+            else:
+                next_ticket, opened_at = row
+                conn.execute("UPDATE admission_queue SET next_ticket = ? WHERE showtime_id = ?",
+                             (max(next_ticket, math.floor((now - opened_at) * rate)) + 1, showtime_id))
+            ticket = max(next_ticket, math.floor((now - opened_at) * rate))
+        return AdmissionTicket(showtime_id, user_id, ticket, opened_at)
+
+    @staticmethod
+    def _serializer():
+        return URLSafeSerializer(current_app.secret_key, salt='admission')
+
+    def dump(self, ticket):
+        return self._serializer().dumps([ticket.showtime_id, ticket.user_id, ticket.ticket, ticket.opened_at])
+
+    def load(self, token):
+        try:
+            return AdmissionTicket(*self._serializer().loads(token))
+        except (BadSignature, TypeError, ValueError):
+            return None
+
+
+admission_queue = AdmissionQueue()
+
+
+def _requested_showtime_id():
+    showtime_id = (request.view_args or {}).get('showtime_id')
+    if showtime_id is None:
+        showtime_id = request.values.get('showtime_id', type=int)
+    return showtime_id
+
+
+def _waiting_response(ticket, rate, as_json):
+    now = time.time()
+    position = ticket.position(rate, now)
+    retry_after = max(1, min(30, math.ceil(ticket.admit_at(rate) - now)))
+    if as_json:
+        resp = jsonify({"ok": False, "admitted": False, "position": position, "retry_after": retry_after,
+                        "error": f"You're in the queue: {position} ahead of you."})
+        resp.status_code = 429
+    else:
+        # Rendered straight from the Jinja env: render_template would run Flask-Login's
+        # context processor, which loads current_user from the database
+        page = current_app.jinja_env.get_template('waiting_room.html')
+        resp = current_app.make_response(page.render(position=position, retry_after=retry_after))
+    resp.headers['Retry-After'] = str(retry_after)
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
+
+
+def admission_required(view=None, as_json=False):
+    """
+    Gate a booking view behind the showtime's waiting room when
+    ADMISSION_QUEUE_ENABLED is set. Put it above @login_required: the
+    waiting page is answered from the session alone, without loading the
+    user, so queued clients refreshing it cost no database query.
+    With as_json=True queued callers get a 429 with their position instead.
+    """
+    if view is None:
+        return lambda v: admission_required(v, as_json=as_json)
+
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        config = current_app.config
+        showtime_id = _requested_showtime_id()
+        user_id = session.get('_user_id')
+        if not config.get('ADMISSION_QUEUE_ENABLED') or showtime_id is None or user_id is None:
+            return view(*args, **kwargs)
+
+        rate = config.get('ADMISSION_RATE', 5.0)
+        window = config.get('ADMISSION_WINDOW_SECONDS', 600)
+        now = time.time()
+        tickets = {}
+        for token in session.get('admission', {}).values():
+            t = admission_queue.load(token)
+            if t is not None and t.user_id == user_id and now <= t.admit_at(rate) + window:
+                tickets[t.showtime_id] = t
+        ticket = tickets.get(showtime_id)
+        if ticket is None:
+            # First visit, or the booking window ran out: join the back of the queue
+            ticket = tickets[showtime_id] = admission_queue.issue(showtime_id, user_id, rate)
+            session['admission'] = {str(sid): admission_queue.dump(t) for sid, t in tickets.items()}
+        if ticket.position(rate, now) > 0:
+            return _waiting_response(ticket, rate, as_json)
+        return view(*args, **kwargs)
+    return wrapped
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import Booking, BookingSeat, SeatHold
+
+
+class BookingResult:
+    """Outcome of claim_seats(): either a booking id or the reason it failed."""
+    __slots__ = ('booking_id', 'lost_seat_ids', 'reason', 'released_seat_ids')
+
+    def __init__(self, booking_id=None, lost_seat_ids=(), reason=None, released_seat_ids=()):
+        self.booking_id = booking_id
+        self.lost_seat_ids = list(lost_seat_ids)
+        self.reason = reason
+        self.released_seat_ids = list(released_seat_ids)  # the user's holds on seats not booked
+
+    @property
+    def ok(self):
+        return self.booking_id is not None
+
+    def __repr__(self):
+        if self.ok:
+            return f"<BookingResult booking={self.booking_id}>"
+        return f"<BookingResult {self.reason} lost={self.lost_seat_ids}>"
+
+
+def begin_immediate():
+    """
+    On SQLite take the database write lock before reading, so the checks
+    below and the insert run as one step. Other workers wait on busy_timeout.
+    """
+    conn = db.session.connection()
+    if conn.dialect.name != 'sqlite':
+        return
+    raw = conn.connection.dbapi_connection
+    if not raw.in_transaction:
+        conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+def _taken_seat_ids(showtime_id, seat_ids):
+    rows = (db.session.query(BookingSeat.seat_id)
+            .filter(BookingSeat.showtime_id == showtime_id, BookingSeat.seat_id.in_(seat_ids))
+            .all())
+    return sorted(r.seat_id for r in rows)
+
+
+def _holds_to_settle(user_id, showtime_id, seat_ids):
+    """Holds on the requested seats, plus every hold of this user for the show."""
+    return (db.session.query(SeatHold.id, SeatHold.seat_id, SeatHold.user_id, SeatHold.expires_at)
+            .filter(SeatHold.showtime_id == showtime_id,
+                    db.or_(SeatHold.seat_id.in_(seat_ids), SeatHold.user_id == user_id))
+            .all())
+
+
+def claim_seats(user_id, showtime_id, seat_ids, extra_guests=0):
+    """
+    Atomically check and claim seat_ids for a user. Returns a BookingResult;
+    on conflict the session is rolled back and lost_seat_ids lists the seats
+    someone else has booked or holds. The user's own holds for the showtime
+    are consumed: booked seats turn into the booking, the rest are released.
+    """
+    seat_ids = [int(sid) for sid in seat_ids]
+    if len(set(seat_ids)) != len(seat_ids):
+        return BookingResult(reason='duplicate_seats')
+
+    try:
+        begin_immediate()
+
+        # Only one free booking per user per showtime
+        if db.session.query(Booking.id).filter_by(user_id=user_id, showtime_id=showtime_id).first():
+            db.session.rollback()
+            return BookingResult(reason='already_booked')
+
+        taken = _taken_seat_ids(showtime_id, seat_ids)
+        holds = _holds_to_settle(user_id, showtime_id, seat_ids)
+        now = datetime.utcnow()
+        taken += [h.seat_id for h in holds if h.user_id != user_id and h.expires_at > now]
+        if taken:
+            db.session.rollback()
+            return BookingResult(lost_seat_ids=sorted(taken), reason='seats_taken')
+        if holds:
+            SeatHold.query.filter(SeatHold.id.in_([h.id for h in holds])).delete(synchronize_session=False)
+        released = sorted(h.seat_id for h in holds if h.user_id == user_id and h.seat_id not in seat_ids)
+
+        booking = Booking(
+            user_id=user_id,
+            showtime_id=showtime_id,
+            seat_numbers=",".join(map(str, seat_ids)),
+            extra_guests=extra_guests,
+            payment_status="Pay at Counter" if extra_guests > 0 else "Not Required"
+        )
+        booking.seats = [BookingSeat(showtime_id=showtime_id, seat_id=sid) for sid in seat_ids]
+        db.session.add(booking)
+        db.session.flush()
+        booking_id = booking.id
+        db.session.commit()
+        return BookingResult(booking_id=booking_id, released_seat_ids=released)
+    except IntegrityError:
+        # Backends without an explicit write lock: the unique index decided the race.
+        db.session.rollback()
+        return BookingResult(lost_seat_ids=_taken_seat_ids(showtime_id, seat_ids), reason='seats_taken')
+    except Exception:
+        db.session.rollback()
+        raise
@@ -0,0 +1,180 @@
+import random
+import time
+
+import click
+from flask.cli import AppGroup
+
+from app.extensions import db
+from app import synthetic
+
+seed_cli = AppGroup('seed', help='Bulk-load seats and synthetic fixtures.')
+
+_seed_option = click.option('--seed', 'seed', default=1, show_default=True,
+                            help='Random seed; the same seed loads the same rows.')
+_batch_option = click.option('--batch-size', default=synthetic.BATCH_SIZE, show_default=True,
+                             help='Rows per executemany.')
+
+
+def _report(name, started, count):
+    db.session.commit()
+    click.echo(f"✅ {count} {name} in {time.perf_counter() - started:.2f}s")
+
+
+@seed_cli.command('seats')
+def seed_seats():
+    """Insert any seats of the standard layout that are missing."""
+    from seat_seeder import seed_seat_layout  # Since it's in project root
+    from app.seat_catalog import load_seat_catalog
+    started = time.perf_counter()
+    count = seed_seat_layout()
+    load_seat_catalog()
+    _report('seats', started, count)
+
+
+@seed_cli.command('movies')
+@click.option('--count', default=40, show_default=True)
+@_seed_option
+@_batch_option
+def seed_movies(count, seed, batch_size):
+    """Synthetic movies."""
+    started = time.perf_counter()
+    _report('movies', started, synthetic.seed_movies(count, random.Random(seed), batch_size))
+
+
+@seed_cli.command('showtimes')
+@click.option('--count', default=2000, show_default=True)
+@_seed_option
+@_batch_option
+def seed_showtimes(count, seed, batch_size):
+    """Showtimes for existing movies, centred on today."""
+    started = time.perf_counter()
+    _report('showtimes', started, synthetic.seed_showtimes(count, random.Random(seed), batch_size=batch_size))
+
+
+@seed_cli.command('users')
+@click.option('--count', default=5000, show_default=True)
+@_seed_option
+@_batch_option
+def seed_users(count, seed, batch_size):
+    """Approved synthetic users with random roles; they cannot log in."""
+    started = time.perf_counter()
+    _report('users', started, synthetic.seed_users(count, random.Random(seed), batch_size))
+
+
+@seed_cli.command('dependents')
+@click.option('--max-per-user', default=2, show_default=True)
+@_seed_option
+@_batch_option
+def seed_dependents(max_per_user, seed, batch_size):
+    """Dependents for every user that has none yet."""
+    started = time.perf_counter()
+    _report('dependents', started, synthetic.seed_dependents(random.Random(seed), max_per_user, batch_size))
+
+
+@seed_cli.command('bookings')
+@click.option('--count', default=100000, show_default=True)
+@_seed_option
+@_batch_option
+def seed_bookings(count, seed, batch_size):
+    """Bookings over existing users and showtimes, on free eligible seats."""
+    started = time.perf_counter()
+    bookings, seats = synthetic.seed_bookings(count, random.Random(seed), batch_size)
+    _report(f'bookings ({seats} seats)', started, bookings)
+
+
+@seed_cli.command('all')
+@click.option('--users', default=5000, show_default=True)
+@click.option('--movies', default=40, show_default=True)
+@click.option('--showtimes', default=2000, show_default=True)
+@click.option('--bookings', default=100000, show_default=True)
+@_seed_option
+@_batch_option
+def seed_all(users, movies, showtimes, bookings, seed, batch_size):
+    """The whole synthetic population used by the benchmarks."""
+    started = time.perf_counter()
+    counts = synthetic.seed_synthetic(users=users, showtimes=showtimes, bookings=bookings, movies=movies,
+                                      seed=seed, batch_size=batch_size)
+    summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+    click.echo(f"✅ {summary} in {time.perf_counter() - started:.2f}s")
+
+
+maintenance_cli = AppGroup('maintenance', help='Run or inspect background maintenance jobs.')
+
+
+@maintenance_cli.command('run')
+@click.argument('jobs', nargs=-1)
+def maintenance_run(jobs):
+    """Run the named jobs now (all jobs when none are given), ignoring schedule and window."""
+    from app.maintenance import maintenance
+    by_name = {job.name: job for job in maintenance.jobs}
+    unknown = [name for name in jobs if name not in by_name]
+    if unknown:
+        raise click.BadParameter(f"unknown job(s): {', '.join(unknown)}; choose from {', '.join(by_name)}")
+    for job in [by_name[name] for name in jobs] or maintenance.jobs:
+        run = maintenance.run_job(job)
+        mark = "✅" if run.status == 'ok' else "❌"
+        click.echo(f"{mark} {job.name}: {run.rows_affected} rows in {run.duration_ms}ms"
+                   + (f" ({run.detail})" if run.detail else ""))
+
+
+@maintenance_cli.command('status')
+def maintenance_status():
+    """Last run of every job."""
+    from app.maintenance import maintenance
+    from app.models import MaintenanceRun
+    for job in maintenance.jobs:
+        run = (MaintenanceRun.query.filter_by(job=job.name)
+               .order_by(MaintenanceRun.started_at.desc()).first())
+        if run is None:
+            click.echo(f"{job.name:<22} never run")
+        else:
+            click.echo(f"{job.name:<22} {run.started_at:%Y-%m-%d %H:%M} UTC  {run.status:<7} "
+                       f"{run.rows_affected:>7} rows {run.duration_ms:>6}ms")
+
+
+passwords_cli = AppGroup('passwords', help='Tune and inspect the password hashing policy.')
+
+
+@passwords_cli.command('calibrate')
+@click.option('--algorithm', type=click.Choice(['scrypt', 'pbkdf2']), default='scrypt', show_default=True)
+@click.option('--target-ms', type=int, default=None, help='Time per hash; defaults to PASSWORD_HASH_TARGET_MS.')
+def passwords_calibrate(algorithm, target_ms):
+    """Find the PASSWORD_HASH_METHOD that costs about --target-ms per hash on this machine."""
+    from flask import current_app
+    from app.passwords import calibrate, time_hash
+    target_ms = target_ms or current_app.config['PASSWORD_HASH_TARGET_MS']
+    current = current_app.config['PASSWORD_HASH_METHOD']
+    click.echo(f"current  {current:<24} {time_hash(current) * 1000:7.1f}ms per hash")
+    method, seconds = calibrate(algorithm, target_ms / 1000)
+    click.echo(f"proposed {method:<24} {seconds * 1000:7.1f}ms per hash (target {target_ms}ms)")
+    click.echo(f"set PASSWORD_HASH_METHOD={method}")
+
+
+@passwords_cli.command('status')
+def passwords_status():
+    """How many stored hashes use each method, and which are due for an upgrade."""
+    from collections import Counter
+    from flask import current_app
+    from app.models import User
+    from app.passwords import canonical_method, stored_method
+    current = canonical_method(current_app.config['PASSWORD_HASH_METHOD'])
+    methods = Counter(stored_method(pw) or 'unusable' for (pw,) in db.session.query(User.password).yield_per(1000))
+    for method, count in methods.most_common():
+        note = "current" if method == current else "upgraded at next login" if method != 'unusable' else ""
+        click.echo(f"{method:<24} {count:>7}  {note}")
+
+
+@click.command('init-db')
+def init_db_command():
+    """Create tables and indexes and seed the seat layout (safe to re-run)."""
+    from app.migrations import init_db
+    started = time.perf_counter()
+    init_db()
+    click.echo(f"✅ Database ready in {time.perf_counter() - started:.2f}s")
+
+
+def init_app(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_cli)
+    app.cli.add_command(maintenance_cli)
+    app.cli.add_command(passwords_cli)
@@ -0,0 +1,200 @@
+import csv
+import io
+import re
+import zipfile
+from datetime import date, time
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from app.extensions import db
+from app.models import Booking, BookingSeat, Dependent, Movie, Seat, Showtime, User
+from app.seat_catalog import get_seat_catalog
+
+# Admin exports, streamed. Rows come from a yield_per() result (a server-side
+# cursor where the driver has one; SQLite steps its cursor lazily anyway), go
+# through a writer that flushes every FLUSH_ROWS rows, and leave the process
+# as they are produced, so memory stays flat however many rows there are.
+# Exports only read: on SQLite in WAL mode bookings keep committing meanwhile.
+
+FLUSH_ROWS = 500
+
+MANIFEST_HEADER = ('Seat', 'Booking', 'Name', 'Email', 'Role', 'Booked For', 'Dependents', 'Guests',
+                   'Payment', 'Status')
+HISTORY_HEADER = ('Booking', 'Date', 'Time', 'Movie', 'Name', 'Email', 'Role', 'Booked For', 'Seats',
+                  'Seat Count', 'Guests', 'Payment', 'Status')
+
+
+def manifest_rows(showtime_id):
+    """Attendees of one showtime, one row per booked seat, in seat order."""
+    dependents = {}
+    booked_users = db.select(Booking.user_id).where(Booking.showtime_id == showtime_id)
+    for user_id, name in db.session.execute(
+            db.select(Dependent.user_id, Dependent.name)
+            .where(Dependent.user_id.in_(booked_users), Dependent.is_approved.is_(True))
+            .order_by(Dependent.user_id, Dependent.id)):
+        dependents.setdefault(user_id, []).append(name)
+
+    query = (db.select(Seat.label, Booking.id, Booking.user_id, User.full_name, User.email, User.role,
+                       Booking.booked_for, Booking.extra_guests, Booking.payment_status, Booking.status)
+             .select_from(BookingSeat)
+             .join(Seat, Seat.id == BookingSeat.seat_id)
+             .join(Booking, Booking.id == BookingSeat.booking_id)
+             .join(User, User.id == Booking.user_id)
+             .where(BookingSeat.showtime_id == showtime_id)
+             .order_by(Seat.id)
+             .execution_options(yield_per=FLUSH_ROWS))
+    for label, booking_id, user_id, name, email, role, booked_for, guests, payment, status in \
+            db.session.execute(query):
+        yield (label, booking_id, name, email, role, booked_for, "; ".join(dependents.get(user_id, ())),
+               guests or 0, payment, status)
+
+
+def history_rows(start, end):
+    """Bookings for showtimes dated start..end (inclusive), in show order."""
+    catalog = get_seat_catalog()
+    position = {seat.id: i for i, seat in enumerate(catalog)}
+    # One row per booked seat from booking_seat (a booking left without seats still
+    # gets one, with seat_id NULL), folded back into one row per booking below
+    query = (db.select(Booking.id, Showtime.date, Showtime.time, Movie.title, User.full_name, User.email,
+                       User.role, Booking.booked_for, Booking.extra_guests, Booking.payment_status,
+                       Booking.status, BookingSeat.seat_id)
+             .select_from(Booking)
+             .join(Showtime, Showtime.id == Booking.showtime_id)
+             .join(Movie, Movie.id == Showtime.movie_id)
+             .join(User, User.id == Booking.user_id)
+             .outerjoin(BookingSeat, BookingSeat.booking_id == Booking.id)
+             .where(Showtime.date >= start, Showtime.date <= end)
+             .order_by(Showtime.date, Showtime.time, Booking.id)
+             .execution_options(yield_per=FLUSH_ROWS))
+    for _, seat_rows in groupby(db.session.execute(query), key=lambda row: row[0]):
+        seat_rows = list(seat_rows)
+        booking_id, day, at, title, name, email, role, booked_for, guests, payment, status, _ = seat_rows[0]
+        seat_ids = sorted((row[-1] for row in seat_rows if row[-1] is not None),
+                          key=lambda sid: position.get(sid, len(position)))
+        yield (booking_id, day, at, title, name, email, role, booked_for,
+               " ".join(catalog.label(sid) for sid in seat_ids), len(seat_ids), guests or 0, payment, status)
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, time):
+        return value.strftime('%H:%M')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _drain(buf):
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
+
+
+def iter_csv(header, rows):
+    """CSV as UTF-8 chunks, with a BOM so Excel picks the encoding."""
+    buf = io.StringIO()
+    buf.write('\ufeff')
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    for n, row in enumerate(rows, 1):
+        # A leading = + - @ would make a spreadsheet evaluate someone's name as a formula
+        writer.writerow(["'" + v if isinstance(v, str) and v[:1] in ('=', '+', '-', '@') else _cell_text(v)
+                         for v in row])
+        if n % FLUSH_ROWS == 0:
+            yield _drain(buf).encode('utf-8')
+    yield _drain(buf).encode('utf-8')
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>',
+    '_rels/.rels':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>',
+    'xl/workbook.xml':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets></workbook>',
+    'xl/_rels/workbook.xml.rels':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>',
+}
+
+_xml_illegal = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable target for ZipFile; drain() returns what was written since the last call."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._written
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _xlsx_cell(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        text = escape(_xml_illegal.sub('', _cell_text(value)))
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+    return f'<c><v>{value}</v></c>'
+
+
+def iter_xlsx(header, rows, sheet='Export'):
+    """
+    A single-sheet .xlsx written as it streams: ZipFile on an unseekable
+    sink uses data descriptors, so nothing has to be rewritten at the end,
+    and cells are inline strings, so no shared-string table builds up.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in _XLSX_PARTS.items():
+            zf.writestr(name, xml.replace('{sheet}', escape(sheet)))
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as part:
+            part.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                       b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            part.write(('<row>' + ''.join(map(_xlsx_cell, header)) + '</row>').encode('utf-8'))
+            for n, row in enumerate(rows, 1):
+                part.write(('<row>' + ''.join(map(_xlsx_cell, row)) + '</row>').encode('utf-8'))
+                if n % FLUSH_ROWS == 0:
+                    yield sink.drain()
+            part.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (iter_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import UserMixin
+
+from app.extensions import db
+from app.metrics import Counter, REGISTRY
+from app.models import User
+
+IDENTITY_CACHE_LOOKUPS = Counter('sandhika_identity_cache_total', 'Flask-Login user_loader lookups, by outcome.',
+                                 ('outcome',))
+REGISTRY.append(IDENTITY_CACHE_LOOKUPS)
+
+
+class UserSnapshot(UserMixin):
+    """
+    The columns requests read from current_user, detached from any session
+    so one instance can be shared by every thread of the worker. Views that
+    need relationships or want to modify the user load the User row.
+    """
+    __slots__ = ('id', 'role', 'is_approved', 'full_name', 'email')
+
+    def __init__(self, id, role, is_approved, full_name, email):
+        self.id = id
+        self.role = role
+        self.is_approved = is_approved
+        self.full_name = full_name
+        self.email = email
+
+    def __repr__(self):
+        return f"<UserSnapshot {self.id} {self.role}>"
+
+
+class IdentityCache:
+    """
+    Per-process LRU of UserSnapshot keyed by user id, behind Flask-Login's
+    user_loader, so an authenticated request costs no query while its
+    entry is fresh. Entries live IDENTITY_CACHE_TTL seconds and at most
+    IDENTITY_CACHE_SIZE are kept. Views that change a user call
+    invalidate() after committing; other workers see the change once
+    their entry expires.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (snapshot, loaded_at)
+
+    @staticmethod
+    def _load(user_id):
+        row = (db.session.query(User.id, User.role, User.is_approved, User.full_name, User.email)
+               .filter(User.id == user_id).first())
+        return UserSnapshot(*row) if row is not None else None
+
+    def get(self, user_id):
+        ttl = current_app.config.get('IDENTITY_CACHE_TTL', 30)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now - entry[1] < ttl:
+                self._entries.move_to_end(user_id)
+                IDENTITY_CACHE_LOOKUPS.inc(outcome='hit')
+                return entry[0]
+
+        IDENTITY_CACHE_LOOKUPS.inc(outcome='miss')
+        snapshot = self._load(user_id)
+        if snapshot is None:
+            self.invalidate(user_id)
+            return None
+        with self._lock:
+            self._entries[user_id] = (snapshot, now)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > current_app.config.get('IDENTITY_CACHE_SIZE', 4096):
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache()
@@ -0,0 +1,43 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Small SQLite files in the instance folder for state that every gunicorn
+# worker on this host must agree on but that does not belong in the main
+# database (admission tickets, rate-limit counters). One connection per
+# thread, WAL, and BEGIN IMMEDIATE around every read-modify-write.
+
+
+class LocalStore:
+    def __init__(self, config_key, filename, schema):
+        self.config_key = config_key
+        self.filename = filename
+        self.schema = schema
+        self.path = None
+        self._local = threading.local()
+
+    def init_app(self, app):
+        self.path = app.config.get(self.config_key) or os.path.join(app.instance_path, self.filename)
+
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'path', None) != self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.schema)
+            self._local.conn, self._local.path = conn, self.path
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
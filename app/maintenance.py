@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.metrics import Counter, Histogram, REGISTRY
+from app.models import EmailOutbox, MaintenanceRun, OTP, SeatHold
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: no leader election, the scheduler stays off
+    fcntl = None
+
+MAINTENANCE_SECONDS = Histogram('sandhika_maintenance_job_seconds', 'Run time per maintenance job.', ('job',),
+                                buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 120.0))
+MAINTENANCE_ROWS = Counter('sandhika_maintenance_rows_total', 'Rows removed or touched by maintenance jobs.',
+                           ('job',))
+REGISTRY.extend([MAINTENANCE_SECONDS, MAINTENANCE_ROWS])
+
+
+class Job:
+    """
+    A periodic job. `heavy` jobs only run inside MAINTENANCE_WINDOW_HOURS;
+    light ones run any time but do their work in small batches.
+    """
+    __slots__ = ('name', 'func', 'interval', 'heavy')
+
+    def __init__(self, name, func, interval, heavy=False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.heavy = heavy
+
+
+def _batched_delete(model, condition, batch_size, pause):
+    """
+    Delete matching rows batch_size at a time, committing and pausing in
+    between so a booking never waits long behind the write lock.
+    """
+    total = 0
+    while True:
+        ids = db.session.query(model.id).filter(condition).limit(batch_size).subquery()
+        deleted = (db.session.query(model).filter(model.id.in_(db.select(ids.c.id)))
+                   .delete(synchronize_session=False))
+        db.session.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+        time.sleep(pause)
+
+
+def purge_expired_otps(config):
+    return _batched_delete(OTP, OTP.expires_at < datetime.utcnow(),
+                           config['MAINTENANCE_BATCH_SIZE'], config['MAINTENANCE_BATCH_PAUSE'])
+
+
+def purge_sent_emails(config):
+    cutoff = datetime.utcnow() - timedelta(days=config['MAINTENANCE_KEEP_SENT_EMAIL_DAYS'])
+    # (status, next_attempt_at) is the outbox's own index; next_attempt_at ~ when the mail was queued
+    return _batched_delete(EmailOutbox, db.and_(EmailOutbox.status == 'sent', EmailOutbox.next_attempt_at < cutoff),
+                           config['MAINTENANCE_BATCH_SIZE'], config['MAINTENANCE_BATCH_PAUSE'])
+
+
+def purge_expired_holds(config):
+    # The hold sweeper normally gets there first; this catches holds of workers that went away
+    return _batched_delete(SeatHold, SeatHold.expires_at < datetime.utcnow(),
+                           config['MAINTENANCE_BATCH_SIZE'], config['MAINTENANCE_BATCH_PAUSE'])
+
+
+def purge_rate_limits(config):
+    from app.rate_limit import rate_limiter
+    return rate_limiter.purge()
+
+
+def purge_old_runs(config):
+    cutoff = datetime.utcnow() - timedelta(days=config['MAINTENANCE_KEEP_RUNS_DAYS'])
+    return _batched_delete(MaintenanceRun, MaintenanceRun.started_at < cutoff,
+                           config['MAINTENANCE_BATCH_SIZE'], config['MAINTENANCE_BATCH_PAUSE'])
+
+
+def optimize_database(config):
+    """
+    Refresh planner statistics and hand up to MAINTENANCE_VACUUM_PAGES free
+    pages back (auto_vacuum=INCREMENTAL is set by init_db), on SQLite only.
+    """
+    conn = db.session.connection()
+    if conn.dialect.name != 'sqlite':
+        return 0
+    conn.exec_driver_sql("ANALYZE")
+    freed = 0
+    if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:  # INCREMENTAL
+        before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        # The pragma frees one page per step, but a plain execute() stops after
+        # the first (the statement has no result columns); executescript()
+        # steps it to the end. It commits the ANALYZE first.
+        conn.connection.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum({int(config['MAINTENANCE_VACUUM_PAGES'])});")
+        freed = before - conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+    db.session.commit()
+    return freed
+
+
+def default_jobs(config):
+    every = config['MAINTENANCE_PURGE_INTERVAL']
+    return [
+        Job('purge_expired_otps', purge_expired_otps, every),
+        Job('purge_expired_holds', purge_expired_holds, every),
+        Job('purge_rate_limits', purge_rate_limits, every),
+        Job('purge_sent_emails', purge_sent_emails, 24 * 3600, heavy=True),
+        Job('purge_old_runs', purge_old_runs, 24 * 3600, heavy=True),
+        Job('optimize_database', optimize_database, 24 * 3600, heavy=True),
+    ]
+
+
+class MaintenanceScheduler:
+    """
+    Runs default_jobs() in one thread per deployment. Every gunicorn worker
+    starts the scheduler, but only the one holding an exclusive flock on
+    <instance>/maintenance.lock runs jobs; the others retry the lock now and
+    then and take over if the leader exits. Each run is recorded in
+    maintenance_run with its duration and rows affected.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock_file = None
+        self.jobs = []
+
+    def init_app(self, app):
+        self._app = app
+        self.jobs = default_jobs(app.config)
+        app.extensions['maintenance'] = self
+
+    def start(self):
+        if fcntl is None or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='maintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._release_leadership()
+
+    def _acquire_leadership(self):
+        if self._lock_file is not None:
+            return True
+        path = self._app.config.get('MAINTENANCE_LOCK_FILE') or os.path.join(self._app.instance_path,
+                                                                             'maintenance.lock')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._lock_file = f
+        return True
+
+    def _release_leadership(self):
+        if self._lock_file is not None:
+            self._lock_file.close()  # closing drops the flock
+            self._lock_file = None
+
+    def in_window(self, now=None):
+        start, end = self._app.config.get('MAINTENANCE_WINDOW_HOURS', (2, 5))
+        hour = (now or datetime.now()).hour
+        return start <= hour < end if start <= end else hour >= start or hour < end
+
+    def _last_runs(self):
+        rows = (db.session.query(MaintenanceRun.job, db.func.max(MaintenanceRun.started_at))
+                .filter(MaintenanceRun.status != 'failed').group_by(MaintenanceRun.job).all())
+        return dict(rows)
+
+    def due_jobs(self, now=None):
+        now = now or datetime.utcnow()
+        last = self._last_runs()
+        in_window = self.in_window()
+        return [job for job in self.jobs
+                if (not job.heavy or in_window)
+                and (job.name not in last or now - last[job.name] >= timedelta(seconds=job.interval))]
+
+    def run_job(self, job):
+        """Run one job now and record it; returns the MaintenanceRun row."""
+        started, t0 = datetime.utcnow(), time.perf_counter()
+        run = MaintenanceRun(job=job.name, started_at=started)
+        try:
+            run.rows_affected = job.func(self._app.config) or 0
+        except Exception as e:
+            db.session.rollback()
+            run.status, run.detail = 'failed', str(e)[:500]
+            self._app.logger.warning("maintenance job %s failed: %s", job.name, e)
+        elapsed = time.perf_counter() - t0
+        run.duration_ms = int(elapsed * 1000)
+        db.session.add(run)
+        db.session.commit()
+        MAINTENANCE_SECONDS.observe(elapsed, job=job.name)
+        MAINTENANCE_ROWS.inc(run.rows_affected, job=job.name)
+        return run
+
+    def _run(self):
+        tick = self._app.config.get('MAINTENANCE_TICK', 60)
+        while not self._stop.wait(tick):
+            if not self._acquire_leadership():
+                continue
+            try:
+                with self._app.app_context():
+                    for job in self.due_jobs():
+                        if self._stop.is_set():
+                            break
+                        self.run_job(job)
+            except Exception as e:
+                self._app.logger.warning("maintenance tick failed: %s", e)
+
+
+maintenance = MaintenanceScheduler()
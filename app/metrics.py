@@ -0,0 +1,167 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request, template_rendered, before_render_template
+
+# Per-process metrics: with several gunicorn workers each one reports its own
+# numbers, so scrape every worker or sum across scrapes.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _fmt_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    inner = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return '{' + inner + '}'
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_fmt_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a bisect and three adds under a lock."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+REQUESTS = Counter('sandhika_requests_total', 'Requests handled, by endpoint and status.',
+                   ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = Histogram('sandhika_request_duration_seconds', 'Wall time per request.',
+                            ('endpoint', 'method'))
+PHASE_SECONDS = Histogram('sandhika_request_phase_seconds',
+                          'Time per request spent in db, template, pdf, mail and password hashing.',
+                          ('endpoint', 'phase'))
+DB_QUERIES = Histogram('sandhika_request_db_queries', 'SQL statements per request.', ('endpoint',),
+                       buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+MAIL_SEND_SECONDS = Histogram('sandhika_mail_send_seconds', 'SMTP time per outbox message.', ('outcome',))
+
+REGISTRY = [REQUESTS, REQUEST_SECONDS, PHASE_SECONDS, DB_QUERIES, MAIL_SEND_SECONDS]
+
+PHASES = ('db', 'template', 'pdf', 'mail', 'password')
+
+
+def _add_phase(phase, seconds):
+    phases = g.get('_phase_seconds')
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase):
+    """Attribute the enclosed block to a phase of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            _add_phase(phase, time.perf_counter() - started)
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Time every request by phase and expose the histograms at /metrics."""
+
+    @app.before_request
+    def _start_request_timer():
+        g._request_started = time.perf_counter()
+        g._phase_seconds = {}
+
+    @app.after_request
+    def _remember_status(response):
+        g._response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _observe_request(exc):
+        started = g.pop('_request_started', None)
+        if started is None:
+            return
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        REQUESTS.inc(endpoint=endpoint, method=request.method,
+                     status=g.pop('_response_status', 500 if exc else 200))
+        phases = g.pop('_phase_seconds', {})
+        stats = g.get('_query_stats')
+        if stats is not None:
+            phases['db'] = stats.elapsed
+            DB_QUERIES.observe(stats.count, endpoint=endpoint)
+        for phase in PHASES:
+            PHASE_SECONDS.observe(phases.get(phase, 0.0), endpoint=endpoint, phase=phase)
+
+    def _template_started(sender, template, context, **extra):
+        if has_request_context():
+            g.setdefault('_template_started', []).append(time.perf_counter())
+
+    def _template_finished(sender, template, context, **extra):
+        if has_request_context():
+            started = g.get('_template_started')
+            if started:
+                _add_phase('template', time.perf_counter() - started.pop())
+
+    before_render_template.connect(_template_started, app, weak=False)
+    template_rendered.connect(_template_finished, app, weak=False)
+
+    if app.config.get('METRICS_ENABLED', True):
+        @app.get('/metrics')
+        def metrics():
+            return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,81 @@
+from app.extensions import db
+from app.models import Booking, BookingSeat
+
+
+def _parse_seat_ids(seat_numbers):
+    return [int(x) for x in (s.strip() for s in (seat_numbers or '').split(',')) if x.isdigit()]
+
+
+def backfill_booking_seats_if_empty():
+    """
+    One-shot copy of the legacy comma-separated Booking.seat_numbers
+    into booking_seat rows. Skipped once the table has any data.
+    """
+    if BookingSeat.query.first() or not Booking.query.first():
+        return
+
+    rows, claimed = [], set()
+    for booking_id, showtime_id, seat_numbers in db.session.query(
+            Booking.id, Booking.showtime_id, Booking.seat_numbers).order_by(Booking.id):
+        for seat_id in _parse_seat_ids(seat_numbers):
+            key = (showtime_id, seat_id)
+            if key in claimed:
+                # Legacy data can hold double bookings; first booking keeps the seat.
+                print(f"⚠️ Seat {seat_id} double-booked for showtime {showtime_id}; keeping earliest booking.")
+                continue
+            claimed.add(key)
+            rows.append({'showtime_id': showtime_id, 'seat_id': seat_id, 'booking_id': booking_id})
+
+    if rows:
+        db.session.execute(BookingSeat.__table__.insert(), rows)
+    db.session.commit()
+    print(f"✅ Backfilled {len(rows)} booking seats.")
+
+
+def ensure_indexes():
+    """
+    create_all() only builds indexes for new tables; add any index declared
+    on the models that an existing database is missing.
+    """
+    inspector = db.inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine, checkfirst=True)
+                created.append(index.name)
+    if created:
+        print(f"✅ Created indexes: {', '.join(created)}")
+    return created
+
+
+def enable_incremental_vacuum():
+    """
+    Switch a SQLite database to auto_vacuum=INCREMENTAL, so the maintenance
+    job's incremental_vacuum can hand free pages back. An existing file only
+    takes the new mode after a full VACUUM, which runs once, here.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            return False
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    print("✅ Enabled incremental auto_vacuum.")
+    return True
+
+
+def init_db():
+    """
+    One-off schema setup: tables, missing indexes, incremental auto_vacuum,
+    the seat layout and the booking_seat backfill. Safe to re-run. Run it as `flask init-db` (the
+    Procfile release step) instead of on every worker boot.
+    """
+    db.create_all()
+    ensure_indexes()
+    enable_incremental_vacuum()
+    from seat_seeder import seed_seats_if_empty  # Since it's in project root
+    seed_seats_if_empty()
+    backfill_booking_seats_if_empty()
@@ -8,7 +8,7 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password = db.Column(db.String(128), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(50), nullable=False)  # 'junior', 'senior', 'officer'
     is_approved = db.Column(db.Boolean, default=False)  # ✅ Rename this to match your code
 
@@ -17,9 +17,9 @@ class User(UserMixin, db.Model):
 
 class OTP(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
     otp = db.Column(db.String(6), nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 # ---------------------------
@@ -29,7 +29,7 @@ class Dependent(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     age = db.Column(db.Integer, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     is_approved = db.Column(db.Boolean, default=False)
 # ---------------------------
 # Movie model
@@ -48,8 +48,8 @@ class Movie(db.Model):
 # ---------------------------
 class Showtime(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False, index=True)
+    date = db.Column(db.Date, nullable=False, index=True)
     time = db.Column(db.Time, nullable=False)
     #movie = db.relationship('Movie', backref='showtimes')
 # ---------------------------
@@ -57,8 +57,8 @@ class Showtime(db.Model):
 # ---------------------------
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    showtime_id = db.Column(db.Integer, db.ForeignKey('showtime.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    showtime_id = db.Column(db.Integer, db.ForeignKey('showtime.id'), nullable=False, index=True)
     seat_numbers = db.Column(db.String(250), nullable=False)
     extra_guests = db.Column(db.Integer, default=0)
     payment_status = db.Column(db.String(50), default='Not Required')
@@ -68,6 +68,78 @@ class Booking(db.Model):
     booked_for = db.Column(db.String(20), default='Self')  # Values: 'Self', 'Dependent', 'Guest'
 
     showtime = db.relationship('Showtime', backref='bookings')
+    seats = db.relationship('BookingSeat', backref='booking', cascade="all, delete-orphan",
+                            order_by='BookingSeat.id')
+
+# ---------------------------
+# BookingSeat model (one row per claimed seat)
+# ---------------------------
+class BookingSeat(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('showtime_id', 'seat_id', name='uq_booking_seat_showtime_seat'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    showtime_id = db.Column(db.Integer, db.ForeignKey('showtime.id'), nullable=False)
+    seat_id = db.Column(db.Integer, db.ForeignKey('seat.id'), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('booking.id'), nullable=False, index=True)
+
+    seat = db.relationship('Seat')
+
+# ---------------------------
+# SeatHold model (a seat set aside for a few minutes while its user books, app.seat_holds)
+# ---------------------------
+class SeatHold(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('showtime_id', 'seat_id', name='uq_seat_hold_showtime_seat'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    showtime_id = db.Column(db.Integer, db.ForeignKey('showtime.id'), nullable=False)
+    seat_id = db.Column(db.Integer, db.ForeignKey('seat.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# ---------------------------
+# EmailOutbox model (queued mail, drained by app.outbox)
+# ---------------------------
+class EmailOutbox(db.Model):
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_due', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.String(500), nullable=False)  # comma-separated
+    sender = db.Column(db.String(120))
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text)
+    html = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(32))
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+# ---------------------------
+# MaintenanceRun model (one row per background job run, app.maintenance)
+# ---------------------------
+class MaintenanceRun(db.Model):
+    __tablename__ = 'maintenance_run'
+    __table_args__ = (
+        db.Index('ix_maintenance_run_job_started', 'job', 'started_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    job = db.Column(db.String(50), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    duration_ms = db.Column(db.Integer, nullable=False, default=0)
+    rows_affected = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='ok')  # ok, skipped, failed
+    detail = db.Column(db.String(500))
 
 class Seat(db.Model):
     id = db.Column(db.Integer, primary_key=True)
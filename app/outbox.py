@@ -0,0 +1,183 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import update
+
+from app.extensions import db, mail
+from app.metrics import MAIL_SEND_SECONDS
+from app.models import EmailOutbox
+
+# A claimed message is re-offered if its sender has not finished within this lease.
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def enqueue_email(msg: Message) -> EmailOutbox:
+    row = EmailOutbox(
+        recipients=",".join(msg.recipients),
+        sender=msg.sender if isinstance(msg.sender, str) else None,
+        subject=msg.subject,
+        body=msg.body,
+        html=msg.html,
+    )
+    db.session.add(row)
+    db.session.commit()
+    outbox_sender.wake()
+    return row
+
+
+def _to_message(row: EmailOutbox) -> Message:
+    msg = Message(subject=row.subject, recipients=row.recipients.split(","), sender=row.sender)
+    msg.body = row.body
+    msg.html = row.html
+    return msg
+
+
+class OutboxSender:
+    """
+    Drains EmailOutbox in the background. A dispatcher thread claims due
+    messages and hands batches to a thread pool; each batch is sent over a
+    single SMTP session. Failures are retried with exponential backoff.
+
+    Started with the app (app.start_background_services) unless
+    OUTBOX_AUTOSTART is off.
+
+    Local testing: run `python -m aiosmtpd -n -l localhost:8025` and start
+    the app with MAIL_SERVER=localhost MAIL_PORT=8025 MAIL_USE_SSL=0.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._pool = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions['outbox_sender'] = self
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._pool = ThreadPoolExecutor(max_workers=self._app.config.get('OUTBOX_WORKERS', 2),
+                                            thread_name_prefix='outbox-send')
+            self._thread = threading.Thread(target=self._run, name='outbox-dispatch', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        poll = self._app.config.get('OUTBOX_POLL_INTERVAL', 5.0)
+        while not self._stop.is_set():
+            try:
+                sent = self.drain(self._pool)
+            except Exception as e:
+                print(f"❌ Outbox dispatch failed: {e}")
+                sent = 0
+            if not sent:
+                self._wake.wait(poll)
+                self._wake.clear()
+
+    def drain(self, pool=None) -> int:
+        """Send one round of due messages. Runs inline when no pool is given."""
+        batches = self._claim_due()
+        if not batches:
+            return 0
+        if pool is None:
+            for batch in batches:
+                self._send_batch(batch)
+        else:
+            wait([pool.submit(self._send_batch, batch) for batch in batches])
+        return sum(len(b) for b in batches)
+
+    def _claim_due(self):
+        app = self._app
+        batch_size = app.config.get('OUTBOX_BATCH_SIZE', 20)
+        limit = batch_size * app.config.get('OUTBOX_WORKERS', 2)
+        token = uuid.uuid4().hex
+        now = datetime.utcnow()
+        with app.app_context():
+            try:
+                due = (db.session.query(EmailOutbox.id)
+                       .filter(EmailOutbox.status.in_(('pending', 'sending')),
+                               EmailOutbox.next_attempt_at <= now)
+                       .order_by(EmailOutbox.id)
+                       .limit(limit)
+                       .scalar_subquery())
+                # Conditional update so two workers never claim the same row
+                db.session.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_(due),
+                           EmailOutbox.status.in_(('pending', 'sending')),
+                           EmailOutbox.next_attempt_at <= now)
+                    .values(status='sending', claimed_by=token, next_attempt_at=now + CLAIM_LEASE)
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.commit()
+                ids = [r.id for r in db.session.query(EmailOutbox.id)
+                       .filter_by(claimed_by=token, status='sending')
+                       .order_by(EmailOutbox.id)]
+            finally:
+                db.session.remove()
+        return [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+
+    def _retry_or_fail(self, row, error):
+        cfg = self._app.config
+        row.attempts += 1
+        row.last_error = str(error)[:500]
+        if row.attempts >= cfg.get('OUTBOX_MAX_ATTEMPTS', 5):
+            row.status = 'failed'
+            print(f"❌ Email to {row.recipients} failed permanently: {error}")
+        else:
+            row.status = 'pending'
+            delay = cfg.get('OUTBOX_RETRY_BASE', 2.0) * (2 ** (row.attempts - 1))
+            row.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            print(f"❌ Email send failed (attempt {row.attempts}), retrying in {delay:.0f}s: {error}")
+
+    def _send_batch(self, ids):
+        with self._app.app_context():
+            rows = EmailOutbox.query.filter(EmailOutbox.id.in_(ids)).order_by(EmailOutbox.id).all()
+            try:
+                with mail.connect() as conn:
+                    for row in rows:
+                        started = time.perf_counter()
+                        try:
+                            conn.send(_to_message(row))
+                        except Exception as e:
+                            MAIL_SEND_SECONDS.observe(time.perf_counter() - started, outcome='error')
+                            self._retry_or_fail(row, e)
+                        else:
+                            MAIL_SEND_SECONDS.observe(time.perf_counter() - started, outcome='sent')
+                            row.status = 'sent'
+                            row.attempts += 1
+                            row.sent_at = datetime.utcnow()
+                            row.last_error = None
+                            print(f"✅ Email sent to {row.recipients}")
+                        db.session.commit()
+            except Exception as e:
+                # Could not open (or lost) the SMTP session: retry what is left.
+                for row in rows:
+                    if row.status == 'sending':
+                        self._retry_or_fail(row, e)
+                db.session.commit()
+            finally:
+                db.session.remove()
+
+
+outbox_sender = OutboxSender()
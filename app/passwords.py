@@ -0,0 +1,94 @@
+import statistics
+import time
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from app.extensions import db
+from app.metrics import Counter, REGISTRY, timed
+
+# Password hashing policy. PASSWORD_HASH_METHOD is a Werkzeug method string,
+# 'scrypt:n:r:p' or 'pbkdf2:sha256:iterations'; `flask passwords calibrate`
+# finds one that costs PASSWORD_HASH_TARGET_MS per hash on this hardware.
+# Every stored hash carries the method it was made with, so hashes from an
+# older policy keep working and are rewritten at the owner's next login.
+
+PASSWORD_REHASHES = Counter('sandhika_password_rehash_total', 'Stored hashes upgraded to the current policy.',
+                            ('from_method',))
+REGISTRY.append(PASSWORD_REHASHES)
+
+
+def canonical_method(method):
+    """The method prefix Werkzeug stores for `method`, with its defaults filled in."""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = (list(map(int, args)) + [2 ** 15, 8, 1][len(args):])[:3]
+        return f"scrypt:{n}:{r}:{p}"
+    if name == 'pbkdf2':
+        digest = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{digest}:{iterations}"
+    raise ValueError(f"unsupported password hash method {method!r}")
+
+
+def stored_method(pwhash):
+    return pwhash.split('$', 1)[0] if '$' in pwhash else None
+
+
+def needs_rehash(pwhash, method=None):
+    method = method or current_app.config['PASSWORD_HASH_METHOD']
+    return stored_method(pwhash) != canonical_method(method)
+
+
+def hash_password(password):
+    with timed('password'):
+        return generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def check_password(user, password):
+    """
+    Verify `password` against the user's stored hash. On success, a hash
+    made under an older policy is replaced with one under the current
+    policy and committed.
+    """
+    with timed('password'):
+        ok = check_password_hash(user.password, password)
+    if ok and needs_rehash(user.password):
+        PASSWORD_REHASHES.inc(from_method=stored_method(user.password) or 'unknown')
+        user.password = hash_password(password)
+        db.session.commit()
+    return ok
+
+
+def time_hash(method, rounds=3, password='Calibrate#2024'):
+    """Median seconds for one generate_password_hash() with `method`."""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        generate_password_hash(password, method=method)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def calibrate(algorithm, target_seconds):
+    """
+    Cheapest method of `algorithm` ('scrypt' or 'pbkdf2') costing at least
+    target_seconds per hash here; returns (method, seconds per hash).
+    scrypt doubles n from 2**12 (memory is 128 * n * r bytes per hash, per
+    thread); pbkdf2 scales iterations from a 100k probe, in 10k steps.
+    """
+    if algorithm == 'scrypt':
+        n = 2 ** 12
+        while True:
+            method = f"scrypt:{n}:8:1"
+            seconds = time_hash(method)
+            if seconds >= target_seconds or n >= 2 ** 17:
+                return method, seconds
+            n *= 2
+    if algorithm == 'pbkdf2':
+        probe = 100_000
+        per_iteration = time_hash(f"pbkdf2:sha256:{probe}") / probe
+        iterations = max(probe, -(-int(target_seconds / per_iteration) // 10_000) * 10_000)
+        method = f"pbkdf2:sha256:{iterations}"
+        return method, time_hash(method)
+    raise ValueError(f"unsupported algorithm {algorithm!r}")
@@ -0,0 +1,99 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from flask import current_app
+
+
+class PdfCache:
+    """
+    Rendered PDFs on disk, named s<showtime>-b<booking>-<sha256>.pdf so they
+    can be dropped per booking or per showtime. The hash of the ticket data
+    doubles as the HTTP ETag. Least recently used files are evicted once the
+    directory grows past PDF_CACHE_MAX_BYTES (hits refresh the file mtime).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts) -> str:
+        raw = json.dumps(parts, default=str, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _dir(self) -> str:
+        path = current_app.config.get('PDF_CACHE_DIR') or os.path.join(current_app.instance_path, 'pdf_cache')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def _path(self, showtime_id, booking_id, key) -> str:
+        return os.path.join(self._dir(), f"s{showtime_id}-b{booking_id}-{key}.pdf")
+
+    def get(self, showtime_id, booking_id, key):
+        path = self._path(showtime_id, booking_id, key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def put(self, showtime_id, booking_id, key, data: bytes):
+        path = self._path(showtime_id, booking_id, key)
+        # Older renders of the same booking are stale once its data changes
+        self._remove(f"s*-b{booking_id}-*.pdf", keep=path)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self._evict()
+
+    def invalidate_booking(self, booking_id):
+        self._remove(f"s*-b{booking_id}-*.pdf")
+
+    def invalidate_showtime(self, showtime_id):
+        self._remove(f"s{showtime_id}-b*-*.pdf")
+
+    def _remove(self, pattern, keep=None):
+        for path in glob.glob(os.path.join(self._dir(), pattern)):
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self):
+        limit = current_app.config.get('PDF_CACHE_MAX_BYTES', 50 * 1024 * 1024)
+        with self._lock:
+            entries, total = [], 0
+            for path in glob.glob(os.path.join(self._dir(), '*.pdf')):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+            if total <= limit:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                if total <= limit:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+pdf_cache = PdfCache()
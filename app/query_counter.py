@@ -0,0 +1,114 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+from app.extensions import db
+
+# Maximum SQL statements per request, by endpoint (includes the login user lookup).
+QUERY_BUDGETS = {
+    'user.dashboard': 5,
+    'user.book_tickets': 9,
+    'user.my_bookings': 4,
+    'user.download_ticket': 4,
+    'user.get_showtimes': 2,
+    'user.seat_availability_api': 3,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    __slots__ = ('count', 'elapsed', 'statements')
+
+    def __init__(self, keep_statements=False):
+        self.count = 0
+        self.elapsed = 0.0  # seconds spent executing statements
+        self.statements = [] if keep_statements else None
+
+    def record(self, statement):
+        self.count += 1
+        if self.statements is not None:
+            self.statements.append(statement)
+
+
+_local = threading.local()
+
+
+def _active_stats():
+    """Stats objects that should see a statement run on this thread."""
+    active = list(getattr(_local, 'stack', ()))
+    if has_app_context():
+        stats = g.get('_query_stats')
+        if stats is not None:
+            active.append(stats)
+    return active
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for stats in _active_stats():
+        stats.record(statement)
+    conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_query_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for stats in _active_stats():
+        stats.elapsed += elapsed
+
+
+@contextmanager
+def count_queries(keep_statements=False):
+    """
+    Count statements run on this thread, e.g. in a test:
+
+        with count_queries() as stats:
+            client.get('/user/my-bookings')
+        assert stats.count <= QUERY_BUDGETS['user.my_bookings']
+    """
+    stats = QueryStats(keep_statements)
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(stats)
+    try:
+        yield stats
+    finally:
+        stack.remove(stats)
+
+
+def init_app(app):
+    """
+    Count queries per request. QUERY_COUNT_HEADER adds X-Query-Count to every
+    response; QUERY_BUDGET_STRICT turns a QUERY_BUDGETS overrun into an error
+    (tests/test_query_budgets.py runs with it on), otherwise it is only logged.
+    """
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def _start_query_stats():
+        g._query_stats = QueryStats()
+
+    @app.after_request
+    def _check_query_budget(response):
+        stats = g.get('_query_stats')
+        if stats is None:
+            return response
+        if app.config.get('QUERY_COUNT_HEADER'):
+            response.headers['X-Query-Count'] = str(stats.count)
+        budget = QUERY_BUDGETS.get(request.endpoint)
+        if budget is not None and stats.count > budget:
+            message = f"{request.endpoint} ran {stats.count} queries (budget {budget})"
+            if app.config.get('QUERY_BUDGET_STRICT'):
+                raise QueryBudgetExceeded(message)
+            app.logger.warning(message)
+        return response
@@ -0,0 +1,146 @@
+import math
+import time
+from functools import wraps
+
+from flask import current_app, flash, make_response, redirect, request, url_for
+
+from app.local_store import LocalStore
+from app.metrics import Counter, REGISTRY
+
+# Sliding-window limits for the auth endpoints. Each key keeps the count of
+# the current fixed window and of the previous one; the estimate is
+# previous * (unelapsed share of the window) + current, which tracks a true
+# sliding window closely with one row per key. Counters live in a LocalStore
+# file so all gunicorn workers on the host share them.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit (
+    key TEXT PRIMARY KEY,
+    window INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    prev_count INTEGER NOT NULL,
+    expires_at REAL NOT NULL   -- once past, the row no longer affects any estimate
+);
+CREATE INDEX IF NOT EXISTS ix_rate_limit_expires_at ON rate_limit (expires_at);
+"""
+
+RATE_LIMIT_CHECKS = Counter('sandhika_rate_limit_total', 'Rate-limit checks, by limit, scope and outcome.',
+                            ('limit', 'scope', 'outcome'))
+REGISTRY.append(RATE_LIMIT_CHECKS)
+
+
+def _estimate(row, window):
+    """(current, previous) counts for `window` from a stored row."""
+    if row is None:
+        return 0, 0
+    stored_window, count, prev_count = row
+    if stored_window == window:
+        return count, prev_count
+    if stored_window == window - 1:
+        return 0, count
+    return 0, 0
+
+
+def _retry_after(limit, period, current, previous, elapsed_share):
+    """Seconds until one more request would fit under the limit."""
+    if current + 1 > limit or previous == 0:
+        return math.ceil(period * (1 - elapsed_share))
+    # previous * (1 - share) + current + 1 <= limit  =>  share >= 1 - (limit - current - 1) / previous
+    needed_share = 1 - (limit - current - 1) / previous
+    return max(1, math.ceil(period * (needed_share - elapsed_share)))
+
+
+class RateLimiter:
+    def __init__(self):
+        self.store = LocalStore('RATE_LIMIT_STORE', 'rate_limit.db', _SCHEMA)
+
+    def init_app(self, app):
+        self.store.init_app(app)
+        app.extensions['rate_limiter'] = self
+
+    def hit(self, checks, now=None):
+        """
+        checks: [(key, limit, period_seconds), ...]. Counts the request
+        against every key if all of them have room, in one transaction.
+        Returns (allowed, retry_after_seconds, index of the first full key).
+        """
+        now = time.time() if now is None else now
+        with self.store.transaction() as conn:
+            updates = []
+            for i, (key, limit, period) in enumerate(checks):
+                window, offset = divmod(now, period)
+                window, share = int(window), offset / period
+                row = conn.execute("SELECT window, count, prev_count FROM rate_limit WHERE key = ?",
+                                   (key,)).fetchone()
+                current, previous = _estimate(row, window)
+                if previous * (1 - share) + current + 1 > limit:
+                    return False, _retry_after(limit, period, current, previous, share), i
+                updates.append((key, window, current + 1, previous, (window + 2) * period))
+            conn.executemany("INSERT OR REPLACE INTO rate_limit (key, window, count, prev_count, expires_at) "
+                             "VALUES (?, ?, ?, ?, ?)", updates)
+        return True, 0, None
+
+    def purge(self, now=None):
+        """Delete counters that can no longer affect a decision; returns how many."""
+        with self.store.transaction() as conn:
+            return conn.execute("DELETE FROM rate_limit WHERE expires_at < ?",
+                                (time.time() if now is None else now,)).rowcount
+
+
+rate_limiter = RateLimiter()
+
+
+def _client_ip():
+    return request.remote_addr or 'unknown'
+
+
+def _scope_value(scope):
+    if scope == 'ip':
+        return _client_ip()
+    if scope == 'email':
+        return (request.form.get('email') or '').strip().lower() or None
+    raise ValueError(f"unknown rate limit scope {scope!r}")
+
+
+def rate_limited(config_key, redirect_to=None, methods=('POST',)):
+    """
+    Apply the limits in Config[config_key], a dict of scope -> (requests,
+    seconds) with scopes 'ip' and 'email' (the posted email field). Runs
+    before the view, so rejected requests never reach password hashing,
+    the database or SMTP. Rejections flash a message and redirect to
+    `redirect_to`, or get a plain 429 when it is None.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            config = current_app.config
+            if not config.get('RATE_LIMIT_ENABLED', True) or request.method not in methods:
+                return view(*args, **kwargs)
+            checks, scopes = [], []
+            for scope, (limit, period) in config.get(config_key, {}).items():
+                value = _scope_value(scope)
+                if value is not None:
+                    checks.append((f"{config_key}:{scope}:{value}:{period}", limit, period))
+                    scopes.append(scope)
+            if not checks:
+                return view(*args, **kwargs)
+
+            allowed, retry_after, full = rate_limiter.hit(checks)
+            name = config_key.replace('RATE_LIMIT_', '').lower()
+            if allowed:
+                for scope in scopes:
+                    RATE_LIMIT_CHECKS.inc(limit=name, scope=scope, outcome='allowed')
+                return view(*args, **kwargs)
+
+            RATE_LIMIT_CHECKS.inc(limit=name, scope=scopes[full], outcome='rejected')
+            wait = f"{math.ceil(retry_after / 60)} minute(s)" if retry_after >= 60 else f"{retry_after} seconds"
+            message = f"Too many attempts. Please try again in {wait}."
+            if redirect_to is None:
+                resp = make_response(message, 429)
+            else:
+                flash(message, "danger")
+                resp = redirect(url_for(redirect_to))
+            resp.headers['Retry-After'] = str(retry_after)
+            return resp
+        return wrapped
+    return decorator
@@ -0,0 +1,151 @@
+from datetime import date
+
+from app.extensions import db
+from app.models import Booking, BookingSeat, Movie, Seat, Showtime
+from app.seat_catalog import get_seat_catalog
+
+PAY_AT_COUNTER = "Pay at Counter"
+
+
+class ShowtimeOccupancy:
+    """One row of the occupancy report."""
+    __slots__ = ('showtime_id', 'movie_title', 'date', 'time', 'bookings', 'seats_booked', 'capacity',
+                 'by_class', 'guests', 'counter_guests', 'counter_amount', 'seat_numbers')
+
+    def __init__(self, showtime_id, movie_title, date, time, capacity):
+        self.showtime_id = showtime_id
+        self.movie_title = movie_title
+        self.date = date
+        self.time = time
+        self.capacity = capacity
+        self.bookings = 0
+        self.seats_booked = 0
+        self.by_class = {}          # restriction class -> seats booked
+        self.guests = 0
+        self.counter_guests = 0     # guests on "Pay at Counter" bookings
+        self.counter_amount = 0
+        self.seat_numbers = []      # local seat numbers, only when the report was asked for them
+
+    @property
+    def occupancy(self):
+        return self.seats_booked / self.capacity if self.capacity else 0.0
+
+
+class OccupancyTotals:
+    """Running totals over the rows a report has yielded so far."""
+    __slots__ = ('showtimes', 'bookings', 'seats_booked', 'capacity', 'by_class', 'guests', 'counter_guests',
+                 'counter_amount')
+
+    def __init__(self):
+        self.showtimes = self.bookings = self.seats_booked = self.capacity = 0
+        self.guests = self.counter_guests = self.counter_amount = 0
+        self.by_class = {}
+
+    def add(self, row):
+        self.showtimes += 1
+        self.bookings += row.bookings
+        self.seats_booked += row.seats_booked
+        self.capacity += row.capacity
+        self.guests += row.guests
+        self.counter_guests += row.counter_guests
+        self.counter_amount += row.counter_amount
+        for restricted, count in row.by_class.items():
+            self.by_class[restricted] = self.by_class.get(restricted, 0) + count
+
+    @property
+    def occupancy(self):
+        return self.seats_booked / self.capacity if self.capacity else 0.0
+
+
+class OccupancyReport:
+    """
+    Per-showtime occupancy between `start` and `end` (inclusive, either may
+    be None), optionally for one movie. Iterating runs the report a chunk
+    of showtimes at a time, keyset-paginated on (date, time, id), so rows
+    reach the caller before later chunks are queried. Each chunk costs four
+    SELECTs (three without seat numbers), aggregated with GROUP BY in the
+    database, whatever the number of bookings. `totals` accumulates as rows are yielded.
+
+    seat_numbers: {seat_id: display number} (admin_routes.build_local_seat_index);
+    when given, each row also lists its booked seats by that number.
+    """
+
+    def __init__(self, start=None, end=None, movie_id=None, seat_numbers=None, guest_fee=50, chunk_size=200):
+        self.start = start
+        self.end = end
+        self.movie_id = movie_id
+        self.seat_numbers = seat_numbers
+        self.guest_fee = guest_fee
+        self.chunk_size = chunk_size
+        self.totals = OccupancyTotals()
+
+    def _showtimes(self, after):
+        query = (db.select(Showtime.id, Movie.title, Showtime.date, Showtime.time)
+                 .join(Movie, Movie.id == Showtime.movie_id))
+        if self.start is not None:
+            query = query.where(Showtime.date >= self.start)
+        if self.end is not None:
+            query = query.where(Showtime.date <= self.end)
+        if self.movie_id:
+            query = query.where(Showtime.movie_id == self.movie_id)
+        if after is not None:
+            query = query.where(db.tuple_(Showtime.date, Showtime.time, Showtime.id) > db.tuple_(*after))
+        query = query.order_by(Showtime.date, Showtime.time, Showtime.id).limit(self.chunk_size)
+        return db.session.execute(query).all()
+
+    def _fill(self, rows):
+        # Core selects: the seat listing can be tens of thousands of rows per chunk
+        by_id = {row.showtime_id: row for row in rows}
+        ids = list(by_id)
+        counter_guests = db.func.sum(db.case((Booking.payment_status == PAY_AT_COUNTER, Booking.extra_guests),
+                                             else_=0))
+        bookings = (db.select(Booking.showtime_id, db.func.count(Booking.id),
+                              db.func.coalesce(db.func.sum(Booking.extra_guests), 0),
+                              db.func.coalesce(counter_guests, 0))
+                    .where(Booking.showtime_id.in_(ids)).group_by(Booking.showtime_id))
+        for showtime_id, count, guests, on_counter in db.session.execute(bookings):
+            row = by_id[showtime_id]
+            row.bookings, row.guests, row.counter_guests = count, guests, on_counter
+            row.counter_amount = on_counter * self.guest_fee
+
+        by_class = (db.select(BookingSeat.showtime_id, Seat.restricted, db.func.count(BookingSeat.id))
+                    .join(Seat, Seat.id == BookingSeat.seat_id)
+                    .where(BookingSeat.showtime_id.in_(ids))
+                    .group_by(BookingSeat.showtime_id, Seat.restricted))
+        for showtime_id, restricted, count in db.session.execute(by_class):
+            row = by_id[showtime_id]
+            row.by_class[restricted or ''] = count
+            row.seats_booked += count
+
+        if self.seat_numbers is not None:
+            numbers = self.seat_numbers
+            listing = db.select(BookingSeat.showtime_id, BookingSeat.seat_id).where(BookingSeat.showtime_id.in_(ids))
+            for showtime_id, seat_id in db.session.execute(listing).tuples():
+                number = numbers.get(seat_id)
+                if number is not None:
+                    by_id[showtime_id].seat_numbers.append(number)
+            for row in rows:
+                row.seat_numbers.sort()
+
+    def __iter__(self):
+        capacity = len(get_seat_catalog())
+        after = None
+        while True:
+            page = self._showtimes(after)
+            if not page:
+                return
+            rows = [ShowtimeOccupancy(sid, title, day, at, capacity) for sid, title, day, at in page]
+            self._fill(rows)
+            for row in rows:
+                self.totals.add(row)
+                yield row
+            if len(page) < self.chunk_size:
+                return
+            after = page[-1][2], page[-1][3], page[-1][0]
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
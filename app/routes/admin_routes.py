@@ -1,9 +1,19 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, session
-from datetime import datetime
+from flask import (Blueprint, Response, abort, render_template, redirect, url_for, flash, request, current_app,
+                   jsonify, send_file, session, stream_with_context)
+from datetime import datetime, date, timedelta
 from app import db
-from app.models import Seat, User, Dependent, Movie, Showtime, Booking
+from app.identity_cache import identity_cache
+from app.models import User, Dependent, Movie, Showtime, Booking, BookingSeat, SeatHold
 from functools import wraps
-from app.utils import send_approval_email, send_dependent_approval_email
+from app.utils import send_approval_email, send_dependent_approval_email, stream_template_buffered
+from app.seat_cache import seat_availability
+from app.pdf_cache import pdf_cache
+from app.seat_map import build_seat_maps, showtimes_in_window
+from app.seat_catalog import get_seat_catalog, load_seat_catalog, seat_level
+from app.reports import OccupancyReport, parse_date
+from app.exports import EXPORT_FORMATS, HISTORY_HEADER, MANIFEST_HEADER, history_rows, manifest_rows
+from app.tickets import BATCH_FORMATS, batch_output, batch_status, start_batch
+import os
 import re
 
 admin_bp = Blueprint('admin_routes', __name__, template_folder='../templates/admin')
@@ -68,6 +78,7 @@ def approve_user(user_id):
     if user:
         user.is_approved = True
         db.session.commit()
+        identity_cache.invalidate(user.id)
         flash('User approved successfully.', 'success')
         send_approval_email(user.email, user.full_name)
     return redirect(url_for('admin_routes.admin_dashboard'))
@@ -90,14 +101,9 @@ def approve_dependent(dependent_id):
 @admin_bp.route('/populate_seats')
 @admin_required
 def populate_seats():
-    for row in range(13):  # Rows A to M
-        row_letter = chr(ord('A') + row)
-        for col in range(1, 11):  # 1 to 10
-            label = f"{row_letter}{col}"
-            if not Seat.query.filter_by(label=label).first():
-                seat = Seat(label=label)
-                db.session.add(seat)
-    db.session.commit()
+    from seat_seeder import seed_seat_layout  # Since it's in project root
+    seed_seat_layout()
+    load_seat_catalog()
     return "Seats populated!"
 
 # ---- MOVIES ----
@@ -137,10 +143,16 @@ def delete_movie(movie_id):
     showtimes = Showtime.query.filter_by(movie_id=movie_id).all()
     for show in showtimes:
         # Delete all bookings for this showtime
+        BookingSeat.query.filter_by(showtime_id=show.id).delete()
+        SeatHold.query.filter_by(showtime_id=show.id).delete()
         Booking.query.filter_by(showtime_id=show.id).delete()
         db.session.delete(show)
+    showtime_ids = [show.id for show in showtimes]
     db.session.delete(movie)
     db.session.commit()
+    for showtime_id in showtime_ids:
+        seat_availability.drop(showtime_id)
+        pdf_cache.invalidate_showtime(showtime_id)
     flash("Movie and all associated showtimes and bookings deleted.", "info")
     return redirect(url_for('admin_routes.admin_dashboard'))
 
@@ -175,9 +187,13 @@ def admin_showtimes():
 def delete_showtime(showtime_id):
     showtime = Showtime.query.get_or_404(showtime_id)
     # Delete all bookings for this showtime
+    BookingSeat.query.filter_by(showtime_id=showtime_id).delete()
+    SeatHold.query.filter_by(showtime_id=showtime_id).delete()
     Booking.query.filter_by(showtime_id=showtime_id).delete()
     db.session.delete(showtime)
     db.session.commit()
+    seat_availability.drop(showtime_id)
+    pdf_cache.invalidate_showtime(showtime_id)
     flash("Showtime and all associated bookings deleted.", "info")
     return redirect(url_for('admin_routes.admin_dashboard'))
 
@@ -186,80 +202,119 @@ def delete_showtime(showtime_id):
 @admin_bp.route('/admin/seats')
 @admin_required
 def admin_seats():
-    showtimes = Showtime.query.all()
-    seat_map = {}
-    for show in showtimes:
-        all_seats = Seat.query.all()
-        bookings = Booking.query.filter_by(showtime_id=show.id).all()
-        booked_seat_ids = {}
-        for b in bookings:
-            user = User.query.get(b.user_id)
-            seat_ids = [int(s) for s in b.seat_numbers.split(",") if s]
-            for sid in seat_ids:
-                booked_seat_ids[sid] = {
-                    "user": user.full_name,
-                    "role": user.role,
-                    "email": user.email
-                }
-        seat_map[show] = {
-            "all_seats": all_seats,
-            "booked_seat_ids": booked_seat_ids
-        }
-    return render_template('admin/admin_seats.html', seat_map=seat_map)
+    # One page = a window of show dates; starts today so upcoming shows come first
+    days = current_app.config.get('ADMIN_SEATS_DAYS_PER_PAGE', 7)
+    start = date.today()
+    start_str = request.args.get('start')
+    if start_str:
+        try:
+            start = datetime.strptime(start_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    showtimes = showtimes_in_window(start, days)
+    seat_map = build_seat_maps(showtimes)
+    return render_template(
+        'admin/admin_seats.html',
+        seat_map=seat_map,
+        window_start=start,
+        window_end=start + timedelta(days=days - 1),
+        prev_start=(start - timedelta(days=days)).isoformat(),
+        next_start=(start + timedelta(days=days)).isoformat()
+    )
 
 # ---- SEAT SUMMARY ----
 @admin_bp.route('/admin/summary')
 @admin_required
 def admin_summary():
-    from sqlalchemy import and_
-
     movie_id = request.args.get('movie_id', type=int)
-    date_str = request.args.get('date')
-
-    filters = []
-    if movie_id:
-        filters.append(Showtime.movie_id == movie_id)
-    if date_str:
-        try:
-            filters.append(Showtime.date == datetime.strptime(date_str, '%Y-%m-%d').date())
-        except:
-            pass
-
-    # Showtimes to include
-    showtimes = Showtime.query.filter(and_(*filters)) if filters else Showtime.query.all()
-    all_seats = Seat.query.all()
-    local_index = build_local_seat_index(all_seats)     # { seat_id: 1..N }
-
-    st_ids = [s.id for s in showtimes]
-    bookings = Booking.query.filter(Booking.showtime_id.in_(st_ids)).all() if st_ids else []
-
-    showtime_bookings = []
-    for show in showtimes:
-        # Collect mapped local numbers for this showtime
-        local_nums = []
-        for b in bookings:
-            if b.showtime_id != show.id:
-                continue
-            # seat_numbers holds comma-separated seat IDs
-            ids = [s for s in (x.strip() for x in (b.seat_numbers or '').split(',')) if s]
-            # map id->local number; keep only those that exist in index
-            mapped = [local_index.get(int(sid), None) for sid in ids if sid.isdigit()]
-            mapped = [m for m in mapped if m is not None]
-            local_nums.extend(mapped)
+    # ?date= (one day) is still accepted alongside the ?start=&end= range
+    start = parse_date(request.args.get('start') or request.args.get('date'))
+    end = parse_date(request.args.get('end') or request.args.get('date'))
 
-        local_nums.sort()
-        flat_seats = ", ".join(map(str, local_nums)) if local_nums else "-"
-
-        showtime_bookings.append({
-            'showtime': show,
-            'seats': flat_seats
-        })
+    catalog = get_seat_catalog()
+    report = OccupancyReport(start, end, movie_id,
+                             seat_numbers=build_local_seat_index(catalog.seats),  # { seat_id: 1..N }
+                             guest_fee=current_app.config.get('GUEST_FEE', 50),
+                             chunk_size=current_app.config.get('REPORT_CHUNK_SIZE', 200))
+    classes = sorted(catalog.free_counts(0), key=seat_level)
 
     movies = Movie.query.all()
-    return render_template(
+    # Streamed: each chunk of showtimes goes out as soon as it is aggregated
+    return stream_template_buffered(
         'admin/admin_summary.html',
         movies=movies,
         selected_movie_id=movie_id,
-        selected_date=date_str,
-        showtime_bookings=showtime_bookings
+        start=start,
+        end=end,
+        classes=classes,
+        report=report
     )
+
+# ---- EXPORTS ----
+def _export_response(fmt, header, rows, filename, sheet):
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    writer, mimetype = EXPORT_FORMATS[fmt]
+    body = writer(header, rows, sheet=sheet) if fmt == 'xlsx' else writer(header, rows)
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="{filename}.{fmt}"',
+        'Cache-Control': 'no-store',
+    })
+
+@admin_bp.route('/admin/export/showtimes/<int:showtime_id>/manifest.<fmt>')
+@admin_required
+def export_manifest(showtime_id, fmt):
+    showtime = Showtime.query.get_or_404(showtime_id)
+    filename = f"manifest-{showtime.date:%Y%m%d}-{showtime.time:%H%M}-{showtime_id}"
+    return _export_response(fmt, MANIFEST_HEADER, manifest_rows(showtime_id), filename, 'Manifest')
+
+@admin_bp.route('/admin/export/bookings.<fmt>')
+@admin_required
+def export_bookings(fmt):
+    # ?month=YYYY-MM, or ?start=&end=; defaults to the current month
+    month = request.args.get('month')
+    try:
+        first = datetime.strptime(month, '%Y-%m').date() if month else date.today().replace(day=1)
+    except ValueError:
+        abort(400)
+    start = parse_date(request.args.get('start')) or first
+    end = parse_date(request.args.get('end')) or (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    filename = f"bookings-{start:%Y%m%d}-{end:%Y%m%d}"
+    return _export_response(fmt, HISTORY_HEADER, history_rows(start, end), filename, 'Bookings')
+
+# ---- BULK TICKETS ----
+@admin_bp.route('/admin/showtimes/<int:showtime_id>/tickets.<fmt>', methods=['POST'])
+@admin_required
+def start_ticket_batch(showtime_id, fmt):
+    if fmt not in BATCH_FORMATS:
+        abort(404)
+    Showtime.query.get_or_404(showtime_id)
+    job_id = start_batch(showtime_id, fmt)
+    return redirect(url_for('admin_routes.ticket_batch', job_id=job_id))
+
+@admin_bp.route('/admin/ticket-batches/<job_id>')
+@admin_required
+def ticket_batch(job_id):
+    status = batch_status(job_id)
+    if status is None:
+        abort(404)
+    showtime = Showtime.query.get(status['showtime_id'])
+    return render_template('admin/ticket_batch.html', job_id=job_id, status=status, showtime=showtime)
+
+@admin_bp.route('/admin/ticket-batches/<job_id>/status')
+@admin_required
+def ticket_batch_status(job_id):
+    status = batch_status(job_id)
+    if status is None:
+        abort(404)
+    return jsonify(status)
+
+@admin_bp.route('/admin/ticket-batches/<job_id>/download')
+@admin_required
+def ticket_batch_download(job_id):
+    path = batch_output(job_id)
+    if path is None:
+        abort(404)
+    mimetype = BATCH_FORMATS[batch_status(job_id)['format']][0]
+    return send_file(path, mimetype=mimetype, as_attachment=True, download_name=os.path.basename(path),
+                     max_age=0)
@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, current_user, login_required
 from app.models import User, Dependent, OTP, Booking, db
 from app.utils import send_otp_email
+from app.passwords import check_password, hash_password
+from app.identity_cache import identity_cache
+from app.rate_limit import rate_limited
 from datetime import datetime, timedelta
 import random
 import string, re
@@ -33,6 +35,7 @@ def home():
 
 # ---------- Send OTP (Registration Step 1) ----------
 @auth_bp.route('/send-otp', methods=['POST'])
+@rate_limited('RATE_LIMIT_OTP', redirect_to='auth.register')
 def send_otp():
     email = request.form.get('email')
     password = request.form.get('password')
@@ -63,7 +66,7 @@ def send_otp():
         'email': email,
         'full_name': full_name,
         'role': role,
-        'hashed_password': generate_password_hash(password),
+        'hashed_password': hash_password(password),
         'otp': otp
     }
 
@@ -79,6 +82,7 @@ def send_otp():
 
 # ---------- Verify Registration OTP (Registration Step 2) ----------
 @auth_bp.route('/verify-registration', methods=['GET', 'POST'])
+@rate_limited('RATE_LIMIT_OTP_VERIFY', redirect_to='auth.verify_registration')
 def verify_registration():
     if request.method == 'POST':
         entered_otp = request.form.get('otp')
@@ -118,6 +122,7 @@ def register():
 
 # ---------- Login ----------
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@rate_limited('RATE_LIMIT_LOGIN', redirect_to='auth.login')
 def login():
     if request.method == 'POST':
         email = request.form['email']
@@ -132,7 +137,7 @@ def login():
             flash('Account pending admin approval.', 'warning')
             return redirect(url_for('auth.login'))
 
-        if check_password_hash(user.password, password):
+        if check_password(user, password):
             login_user(user)
             flash('Login successful.', 'success')
 
@@ -159,6 +164,7 @@ def logout():
 
 # ---------- Forgot Password ----------
 @auth_bp.route('/forgot-password', methods=['GET', 'POST'])
+@rate_limited('RATE_LIMIT_OTP', redirect_to='auth.forgot_password')
 def forgot_password():
     if request.method == 'POST':
         email = request.form.get('email')
@@ -181,6 +187,7 @@ def forgot_password():
 
 # ---------- Reset Password ----------
 @auth_bp.route('/reset-password', methods=['GET', 'POST'])
+@rate_limited('RATE_LIMIT_OTP_VERIFY', redirect_to='auth.reset_password')
 def reset_password():
     if request.method == 'POST':
         entered_otp = request.form.get('otp')
@@ -203,8 +210,9 @@ def reset_password():
 
         user = User.query.filter_by(email=email).first()
         if user:
-            user.password = generate_password_hash(new_password)
+            user.password = hash_password(new_password)
             db.session.commit()
+            identity_cache.invalidate(user.id)
 
         session.pop('reset_email', None)
         session.pop('reset_otp', None)
@@ -224,9 +232,10 @@ def clear_approval_flag():
 
 # ---------- Test Email (Optional Dev Route) ----------
 @auth_bp.route('/test-email')
+@rate_limited('RATE_LIMIT_TEST_EMAIL', methods=('GET',))
 def test_email():
     try:
         send_otp_email('test@example.com', '123456')
-        return "Email sent successfully"
+        return "Email queued successfully"
     except Exception as e:
         return f"Error sending email: {e}"
@@ -1,38 +1,57 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify
+import base64
+import hashlib
+
+from flask import Blueprint, Response, current_app, render_template, redirect, url_for, request, flash, jsonify
 from flask_login import login_required, current_user
 from datetime import datetime
-from app.models import User, Dependent, Booking, Showtime, Seat, Movie
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import Dependent, Booking, Showtime, Movie
 from app import db
 from app.utils import render_pdf_from_template, make_pdf_response  
+from app.seat_cache import seat_availability
+from app.seat_events import seat_events
+from app.seat_grid import seat_grid_cache
+from app.booking_engine import claim_seats
+from app.seat_holds import place_hold, release_hold, user_holds
+from app.admission import admission_required
+from app.pdf_cache import pdf_cache
+from app.tickets import ticket_context
+from app.seat_catalog import ROLE_PRIORITY, get_seat_catalog
 
 user_bp = Blueprint('user', __name__, url_prefix='/user')
 
-ROLE_PRIORITY = {'junior': 1, 'senior': 2, 'officer': 3}
 ROLE_MAP = {'junior': 'Junior Sailor', 'senior': 'Senior Sailor', 'officer': 'Officer'}
 
+def _booking_with_details():
+    # Booking -> showtime -> movie in one join, seat ids in one extra SELECT;
+    # labels come from the in-memory seat catalog
+    return Booking.query.options(
+        joinedload(Booking.showtime).joinedload(Showtime.movie),
+        selectinload(Booking.seats),
+    )
+
 # DASHBOARD
 @user_bp.route('/dashboard')
 @login_required
 def dashboard():
     from datetime import date
     today = date.today()
-    showtime = Showtime.query.filter(Showtime.date >= today).order_by(Showtime.date, Showtime.time).first()
+    showtime = (Showtime.query.options(joinedload(Showtime.movie))
+                .filter(Showtime.date >= today).order_by(Showtime.date, Showtime.time).first())
     user_has_booking, booked_seats, booking, movie_title = False, [], None, None
 
     if showtime:
-        booking = Booking.query.filter_by(user_id=current_user.id, showtime_id=showtime.id).first()
+        booking = (Booking.query.options(selectinload(Booking.seats))
+                   .filter_by(user_id=current_user.id, showtime_id=showtime.id).first())
         user_has_booking = booking is not None
         if booking:
-            seat_ids = [int(sid) for sid in booking.seat_numbers.split(",") if sid]
-            seats = Seat.query.filter(Seat.id.in_(seat_ids)).all()
-            booked_seats = [s.label for s in seats]
-            movie_title = Movie.query.get(showtime.movie_id).title
+            catalog = get_seat_catalog()
+            booked_seats = [catalog.label(bs.seat_id) for bs in booking.seats]
+            movie_title = showtime.movie.title
 
-    all_seats = Seat.query.all() if showtime else []
-    bookings = Booking.query.filter_by(showtime_id=showtime.id).all() if showtime else []
-    booked_seat_ids = []
-    for b in bookings:
-        booked_seat_ids.extend([int(x) for x in b.seat_numbers.split(",") if x])
+    all_seats = list(get_seat_catalog()) if showtime else []
+    booked_seat_ids = seat_availability.get(showtime.id) if showtime else []
 
     return render_template(
         'user_dashboard.html',
@@ -48,31 +67,21 @@ def dashboard():
 
 # SEAT BOOKING (GET: show grid, POST: process booking)
 @user_bp.route('/book', methods=['GET', 'POST'])
+@admission_required
 @login_required
 def book_tickets():
-    # Movie & showtime selection
-    movies = Movie.query.all()
-    selected_movie_id = request.args.get('movie_id', type=int)
-    selected_showtime_id = request.args.get('showtime_id', type=int)
-    showtimes = []
-    seats, booked_ids = [], []
-
-    if selected_movie_id:
-        showtimes = Showtime.query.filter_by(movie_id=selected_movie_id).order_by(Showtime.date, Showtime.time).all()
-    if selected_showtime_id:
-        seats = Seat.query.order_by(Seat.label).all()
-        bookings = Booking.query.filter_by(showtime_id=selected_showtime_id).all()
-        for b in bookings:
-            booked_ids.extend([int(x) for x in b.seat_numbers.split(",") if x])
-
     # POST: booking logic
     if request.method == 'POST':
-        showtime_id = request.form.get('showtime_id')
+        showtime_id = request.form.get('showtime_id', type=int)
         if not showtime_id:
             flash("Select showtime.", "warning")
             return redirect(request.url)
 
-        seat_ids = request.form.getlist('seat_ids')
+        try:
+            seat_ids = [int(sid) for sid in request.form.getlist('seat_ids')]
+        except ValueError:
+            flash("Invalid seat selection.", "danger")
+            return redirect(request.url)
         self_count = int(request.form.get('self_count', 0))
         dependent_count = int(request.form.get('dependent_count', 0))
         guest_count = int(request.form.get('guest_count', 0))
@@ -88,49 +97,51 @@ def book_tickets():
             flash("You can only book for approved dependents.", "danger")
             return redirect(request.url)
 
-        # Prevent more than 1 free seat per type (per show)
-        prior = Booking.query.filter_by(user_id=current_user.id, showtime_id=showtime_id).first()
-        if prior:
-            flash("You have already booked free seats for this showtime.", "danger")
+        # Role logic: one mask check against the seats this role may book
+        catalog = get_seat_catalog()
+        if catalog.unknown(seat_ids) or len(set(seat_ids)) != len(seat_ids):
+            flash("Invalid seat selection.", "danger")
             return redirect(request.url)
-
-        # Role logic
-        user_role = current_user.role.lower()
-        user_level = ROLE_PRIORITY.get(user_role, 1)
-
-        all_seat_objs = Seat.query.filter(Seat.id.in_(seat_ids)).all()
-        for seat in all_seat_objs:
-            seat_restriction = seat.restricted.lower() if seat.restricted else 'junior'
-            seat_level = ROLE_PRIORITY.get(seat_restriction, 1)
-            if user_level < seat_level:
-                flash(f"Seat {seat.label} not allowed for your role.", "danger")
-                return redirect(request.url)
-
-        # Already booked seat?
-        bookings = Booking.query.filter_by(showtime_id=showtime_id).all()
-        all_booked_ids = []
-        for b in bookings:
-            all_booked_ids.extend([int(x) for x in b.seat_numbers.split(",") if x])
-        if any(int(sid) in all_booked_ids for sid in seat_ids):
-            flash("One or more seats are already booked.", "danger")
+        denied = catalog.ineligible(current_user.role, seat_ids)
+        if denied:
+            flash(f"Seat {catalog.label(denied[0])} not allowed for your role.", "danger")
             return redirect(request.url)
 
-        # Save booking
-        booking = Booking(
-            user_id=current_user.id,
-            showtime_id=showtime_id,
-            seat_numbers=",".join(seat_ids),
-            extra_guests=guest_count,
-            payment_status="Pay at Counter" if guest_count > 0 else "Not Required"
-        )
-        db.session.add(booking)
-        db.session.commit()
+        # Check and claim the seats in one transaction
+        result = claim_seats(current_user.id, showtime_id, seat_ids, extra_guests=guest_count)
+        if result.reason == 'already_booked':
+            # Prevent more than 1 free seat per type (per show)
+            flash("You have already booked free seats for this showtime.", "danger")
+            return redirect(request.url)
+        if not result.ok:
+            seat_availability.mark_booked(showtime_id, result.lost_seat_ids)
+            lost = ", ".join(catalog.label(sid) for sid in result.lost_seat_ids)
+            flash(f"Seats already booked or held by someone else: {lost}." if lost else "One or more seats are already booked.", "danger")
+            return redirect(request.url)
+        seat_availability.mark_booked(showtime_id, seat_ids)
+        seat_availability.mark_released(showtime_id, result.released_seat_ids)
         if guest_count > 0:
             flash(f"Booking successful. ₹50/guest (x{guest_count}) to be paid at counter.", "info")
         else:
             flash("Booking successful!", "success")
         return redirect(url_for('user.my_bookings'))
 
+    # Movie & showtime selection
+    movies = Movie.query.all()
+    selected_movie_id = request.args.get('movie_id', type=int)
+    selected_showtime_id = request.args.get('showtime_id', type=int)
+    showtimes = []
+    grid_html, held_ids = None, []
+
+    if selected_movie_id:
+        showtimes = Showtime.query.filter_by(movie_id=selected_movie_id).order_by(Showtime.date, Showtime.time).all()
+    if selected_showtime_id:
+        # Seats this user holds are taken for everyone else but still selectable here
+        held_ids = user_holds(current_user.id, selected_showtime_id)
+        taken = seat_availability.get(selected_showtime_id)
+        grid_html = seat_grid_cache.render(get_seat_catalog(), selected_showtime_id, taken.bits,
+                                           current_user.role, held_ids)
+
     # Get dependents for seat form
     dependents = Dependent.query.filter_by(user_id=current_user.id, is_approved=True).all()
 
@@ -140,63 +151,38 @@ def book_tickets():
         showtimes=showtimes,
         selected_movie_id=selected_movie_id,
         selected_showtime_id=selected_showtime_id,
-        seats=seats,
-        booked_seat_ids=booked_ids,
+        seat_grid=grid_html,
+        held_seat_ids=held_ids,
+        hold_seconds=current_app.config.get('SEAT_HOLD_SECONDS', 180),
         user_role=current_user.role,
-        user_level=ROLE_PRIORITY.get(current_user.role, 1),
+        user_level=ROLE_PRIORITY.get(current_user.role.lower(), 1),
         dependents=dependents
     )
 
 @user_bp.route('/download-ticket/<int:booking_id>')
 @login_required
 def download_ticket(booking_id):
-    booking = Booking.query.get_or_404(booking_id)
+    booking = _booking_with_details().filter(Booking.id == booking_id).first_or_404()
     if booking.user_id != current_user.id:
         flash("Unauthorized access.", "danger")
         return redirect(url_for('user.my_bookings'))
 
-    showtime = Showtime.query.get(booking.showtime_id)
-    movie = Movie.query.get(showtime.movie_id)
-    # seats chosen for this booking
-    seat_labels = []
-    for sid in booking.seat_numbers.split(','):
-        sid = sid.strip()
-        if sid:
-            seat = Seat.query.get(int(sid))
-            if seat:
-                seat_labels.append(seat.label)
-
-# --- Build "ticket_for" summary (no DB change needed) ---
-    total = len(seat_labels)
-    guests = int(booking.extra_guests or 0)
-    has_self = (total - guests) >= 1  # assume user included if at least 1 seat left after guests
-    dependents = max(0, total - guests - (1 if has_self else 0))
-
-    parts = []
-    if has_self:
-        parts.append("Self")
-    if dependents > 0:
-        parts.append(f"{dependents} Dependent{'s' if dependents > 1 else ''}")
-    if guests > 0:
-        parts.append(f"{guests} Guest{'s' if guests > 1 else ''}")
-    ticket_for = " + ".join(parts) if parts else "—"
-
-# pass to template
-    ctx = {
-    "booking": booking,
-    "showtime": showtime,
-    "movie": movie,
-    "seat_labels": seat_labels,
-    "ticket_for": ticket_for,
-    }
-    pdf_bytes = render_pdf_from_template("ticket_pdf.html", **ctx)
-    if not pdf_bytes:
-        return "Error generating PDF", 500
+    ctx, etag, filename = ticket_context(booking, get_seat_catalog())
+    showtime_id = booking.showtime_id
+
+    def render():
+        pdf_bytes = pdf_cache.get(showtime_id, booking.id, etag)
+        if pdf_bytes is None:
+            pdf_bytes = render_pdf_from_template("ticket_pdf.html", **ctx)
+            if pdf_bytes:
+                pdf_cache.put(showtime_id, booking.id, etag, pdf_bytes)
+        return pdf_bytes
 
     return make_pdf_response(
-    pdf_bytes,
-    filename=f"Ticket_{movie.title.replace(' ', '_')}.pdf",
-    inline=True
+    render,
+    filename=filename,
+    inline=True,
+    etag=etag
 )
 
 
@@ -215,18 +201,16 @@ def view_dependents():
 @user_bp.route('/my-bookings')
 @login_required
 def my_bookings():
-    bookings = Booking.query.filter_by(user_id=current_user.id).all()
+    bookings = _booking_with_details().filter(Booking.user_id == current_user.id).all()
+    catalog = get_seat_catalog()
     enriched_bookings = []
     for booking in bookings:
-        show = Showtime.query.get(booking.showtime_id)
-        movie = Movie.query.get(show.movie_id)
-        seat_ids = [int(sid) for sid in booking.seat_numbers.split(",") if sid]
-        seat_objects = Seat.query.filter(Seat.id.in_(seat_ids)).all()
+        show = booking.showtime
         enriched_bookings.append({
             "id": booking.id,
             "showtime": show,
-            "movie": movie,
-            "seats": seat_objects,
+            "movie": show.movie,
+            "seats": [seat for seat in (catalog.get(bs.seat_id) for bs in booking.seats) if seat],
             "extra_guests": booking.extra_guests,
             "payment_status": booking.payment_status
         })
@@ -234,7 +218,12 @@ def my_bookings():
 
 @user_bp.route('/get_showtimes/<int:movie_id>')
 def get_showtimes(movie_id):
-    showtimes = Showtime.query.filter_by(movie_id=movie_id).all()
+    now = datetime.now()
+    showtimes = (Showtime.query.with_entities(Showtime.id, Showtime.date, Showtime.time)
+                 .filter(Showtime.movie_id == movie_id)
+                 .filter(or_(Showtime.date > now.date(),
+                             and_(Showtime.date == now.date(), Showtime.time >= now.time())))
+                 .order_by(Showtime.date, Showtime.time).all())
     # Format the date & time for easy reading
     data = []
     for show in showtimes:
@@ -243,7 +232,86 @@ def get_showtimes(movie_id):
             "date": show.date.strftime('%d %b %Y'),
             "time": show.time.strftime('%I:%M %p')
         })
-    return jsonify(data)
+    resp = jsonify(data)
+    resp.headers["Cache-Control"] = "public, max-age=0, must-revalidate"
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+@user_bp.route('/api/showtimes/<int:showtime_id>/availability')
+@login_required
+def seat_availability_api(showtime_id):
+    """
+    Booked seats as a base64 bitmap (bit n of the little-endian integer is
+    seat id n) plus free seats per restriction class. The ETag is derived
+    from the bitmap and the seat layout, so every worker hands out the same
+    one and a polling client gets 304s until a booking changes.
+    """
+    if seat_availability.peek(showtime_id) is None:
+        Showtime.query.get_or_404(showtime_id)
+    entry = seat_availability.get(showtime_id)
+    catalog = get_seat_catalog()
+    bitmap = entry.bits.to_bytes((entry.bits.bit_length() + 7) // 8, 'little')
+    etag = hashlib.blake2b(bitmap, digest_size=8, key=catalog.fingerprint.encode()).hexdigest()
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = jsonify({
+            "showtime_id": showtime_id,
+            "booked": base64.b64encode(bitmap).decode(),
+            "booked_count": len(entry),
+            "free": catalog.free_counts(entry.bits),
+        })
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "private, no-cache"
+    return resp
+
+@user_bp.route('/showtimes/<int:showtime_id>/seats/stream')
+@login_required
+def seat_stream(showtime_id):
+    # Live seat changes for the booking grid (server-sent events)
+    sub = seat_events.try_subscribe(showtime_id, current_app.config.get('SEAT_STREAM_MAX_CLIENTS', 24))
+    if sub is None:
+        return Response("Too many live seat streams, retry later.", status=503, headers={"Retry-After": "30"})
+    try:
+        Showtime.query.get_or_404(showtime_id)
+        snapshot = seat_availability.get(showtime_id)
+    except BaseException:
+        seat_events.unsubscribe(sub)
+        raise
+    # The generator outlives the request; end the session so it holds no connection
+    db.session.remove()
+    return Response(seat_events.stream(sub, snapshot), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+HOLD_REFUSED = {
+    'booked': "Seat is already booked.",
+    'held': "Seat is being booked by someone else.",
+    'too_many': "You are holding too many seats for this show.",
+}
+
+@user_bp.route('/showtimes/<int:showtime_id>/holds', methods=['POST'])
+@admission_required(as_json=True)
+@login_required
+def hold_seat(showtime_id):
+    # Set a seat aside for SEAT_HOLD_SECONDS while the user fills in the booking
+    seat_id = request.form.get('seat_id', type=int)
+    catalog = get_seat_catalog()
+    if seat_id is None or catalog.unknown([seat_id]):
+        return jsonify({"ok": False, "error": "Invalid seat."}), 400
+    if catalog.ineligible(current_user.role, [seat_id]):
+        return jsonify({"ok": False, "error": "Seat not allowed for your role."}), 403
+    Showtime.query.get_or_404(showtime_id)
+    config = current_app.config
+    result = place_hold(current_user.id, showtime_id, seat_id,
+                        config.get('SEAT_HOLD_SECONDS', 180), config.get('SEAT_HOLD_MAX_PER_USER', 10))
+    if not result.ok:
+        return jsonify({"ok": False, "reason": result.reason, "error": HOLD_REFUSED[result.reason]}), 409
+    return jsonify({"ok": True, "seat_id": seat_id, "expires_at": result.expires_at.isoformat() + "Z"})
+
+@user_bp.route('/showtimes/<int:showtime_id>/holds/<int:seat_id>', methods=['DELETE'])
+@login_required
+def release_seat(showtime_id, seat_id):
+    return jsonify({"ok": release_hold(current_user.id, showtime_id, seat_id)})
 
 @user_bp.route('/cancel-booking/<int:booking_id>', methods=['POST'])
 @login_required
@@ -252,8 +320,11 @@ def cancel_booking(booking_id):
     if booking.user_id != current_user.id:
         flash("Unauthorized cancellation.", "danger")
         return redirect(url_for('user.my_bookings'))
+    showtime_id, seat_ids = booking.showtime_id, [bs.seat_id for bs in booking.seats]
     db.session.delete(booking)
     db.session.commit()
+    seat_availability.mark_released(showtime_id, seat_ids)
+    pdf_cache.invalidate_booking(booking_id)
     flash("Booking cancelled.", "success")
     return redirect(url_for('user.my_bookings'))
 
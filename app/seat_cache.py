@@ -0,0 +1,119 @@
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from app.extensions import db
+from app.models import BookingSeat, SeatHold
+
+
+class SeatAvailability:
+    """Taken seats (booked or held) of one showtime as an int bitset (bit n = seat id n)."""
+    __slots__ = ('bits', 'version', 'loaded_at')
+
+    def __init__(self, bits=0, version=0, loaded_at=0.0):
+        self.bits = bits
+        self.version = version
+        self.loaded_at = loaded_at
+
+    def __contains__(self, seat_id):
+        return seat_id is not None and (self.bits >> int(seat_id)) & 1 == 1
+
+    def __iter__(self):
+        bits, seat_id = self.bits, 0
+        while bits:
+            if bits & 1:
+                yield seat_id
+            bits >>= 1
+            seat_id += 1
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+
+class SeatAvailabilityCache:
+    """
+    Per-process cache of SeatAvailability keyed by showtime id.
+    Writes from this worker patch the bitset in place; entries are reloaded
+    after SEAT_CACHE_TTL seconds to pick up bookings made by other workers.
+    Listeners are called with (showtime_id, old, new) whenever an entry's
+    bits change; new is None when the entry is dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._listeners = []
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, showtime_id, old, new):
+        for listener in self._listeners:
+            listener(showtime_id, old, new)
+
+    @staticmethod
+    def _load_bits(showtime_id):
+        booked = db.select(BookingSeat.seat_id).where(BookingSeat.showtime_id == showtime_id)
+        held = db.select(SeatHold.seat_id).where(SeatHold.showtime_id == showtime_id,
+                                                 SeatHold.expires_at > datetime.utcnow())
+        bits = 0
+        for (seat_id,) in db.session.execute(db.union_all(booked, held)):
+            bits |= 1 << seat_id
+        return bits
+
+    def get(self, showtime_id):
+        ttl = current_app.config.get('SEAT_CACHE_TTL', 2.0)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(showtime_id)
+            if entry is not None and now - entry.loaded_at < ttl:
+                return entry
+
+        bits = self._load_bits(showtime_id)
+        with self._lock:
+            current = self._entries.get(showtime_id)
+            version = current.version + 1 if current is not None else 1
+            if current is not None and current.bits == bits:
+                version = current.version
+            entry = SeatAvailability(bits, version, now)
+            self._entries[showtime_id] = entry
+        if current is not None and current.bits != bits:
+            self._notify(showtime_id, current, entry)
+        return entry
+
+    def peek(self, showtime_id):
+        """The cached entry as it is, without reloading; None if not cached."""
+        with self._lock:
+            return self._entries.get(showtime_id)
+
+    def _patch(self, showtime_id, seat_ids, booked):
+        with self._lock:
+            current = self._entries.get(showtime_id)
+            if current is None:
+                return
+            mask = 0
+            for seat_id in seat_ids:
+                mask |= 1 << int(seat_id)
+            bits = current.bits | mask if booked else current.bits & ~mask
+            # Swap in a new snapshot so readers holding the old one never see a half update.
+            entry = SeatAvailability(bits, current.version + 1, current.loaded_at)
+            self._entries[showtime_id] = entry
+        if bits != current.bits:
+            self._notify(showtime_id, current, entry)
+
+    def mark_booked(self, showtime_id, seat_ids):
+        self._patch(showtime_id, seat_ids, booked=True)
+
+    def mark_released(self, showtime_id, seat_ids):
+        self._patch(showtime_id, seat_ids, booked=False)
+
+    def drop(self, showtime_id):
+        with self._lock:
+            current = self._entries.pop(showtime_id, None)
+        if current is not None:
+            self._notify(showtime_id, current, None)
+
+
+seat_availability = SeatAvailabilityCache()
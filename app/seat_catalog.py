@@ -0,0 +1,139 @@
+import hashlib
+import re
+import threading
+from collections import namedtuple
+
+from app.models import Seat
+
+ROLE_PRIORITY = {'junior': 1, 'senior': 2, 'officer': 3}
+# Seat.restricted values written by seat_seeder; unrestricted seats count as junior
+RESTRICTION_LEVEL = {'junior sailor': 1, 'senior sailor': 2, 'officer': 3}
+
+SeatRecord = namedtuple('SeatRecord', 'id label row number restricted level')
+
+_label_re = re.compile(r'^([A-Z]+)(\d+)$')
+
+
+def seat_level(restricted):
+    return RESTRICTION_LEVEL.get((restricted or '').strip().lower(), 1)
+
+
+def role_level(role):
+    return ROLE_PRIORITY.get((role or '').strip().lower(), 1)
+
+
+def _split_label(label):
+    m = _label_re.match((label or '').strip().upper())
+    if not m:
+        return (label or '').strip().upper(), 0
+    row, num = m.groups()
+    return row, int(num)
+
+
+class SeatCatalog:
+    """
+    Immutable snapshot of the Seat table. Seats are kept in row order
+    (A1..A10, B1..) and every role level has a bitmask of the seat ids it
+    may book (bit n = seat id n), so validating a request is one AND.
+    A role books the seats of its own class only: the booking grid offers
+    exactly these, and the server-side checks use the same masks.
+    """
+    __slots__ = ('seats', 'fingerprint', '_by_id', '_by_label', '_rows', '_level_masks', '_class_masks')
+
+    def __init__(self, records):
+        self.seats = tuple(sorted(records, key=lambda s: (s.row, s.number)))
+        self._by_id = {s.id: s for s in self.seats}
+        self._by_label = {s.label: s.id for s in self.seats}
+        rows = {}
+        for s in self.seats:
+            rows.setdefault(s.row, []).append(s)
+        self._rows = tuple((row, tuple(seats)) for row, seats in rows.items())
+        self._level_masks = {}
+        for level in sorted(set(ROLE_PRIORITY.values())):
+            mask = 0
+            for s in self.seats:
+                if s.level == level:
+                    mask |= 1 << s.id
+            self._level_masks[level] = mask
+        self._class_masks = {}
+        for s in self.seats:
+            key = s.restricted or ''
+            self._class_masks[key] = self._class_masks.get(key, 0) | (1 << s.id)
+        # Changes whenever seats are added or reclassified; part of availability ETags
+        layout = ';'.join(f"{s.id}:{s.label}:{s.restricted}" for s in self.seats)
+        self.fingerprint = hashlib.blake2b(layout.encode(), digest_size=6).hexdigest()
+
+    @classmethod
+    def from_db(cls):
+        records = []
+        for seat_id, label, restricted in Seat.query.with_entities(Seat.id, Seat.label, Seat.restricted):
+            row, number = _split_label(label)
+            records.append(SeatRecord(seat_id, label, row, number, restricted, seat_level(restricted)))
+        return cls(records)
+
+    def __len__(self):
+        return len(self.seats)
+
+    def __iter__(self):
+        return iter(self.seats)
+
+    def get(self, seat_id):
+        return self._by_id.get(seat_id)
+
+    def label(self, seat_id):
+        seat = self._by_id.get(seat_id)
+        return seat.label if seat else str(seat_id)
+
+    def id_for(self, label):
+        return self._by_label.get((label or '').strip().upper())
+
+    def rows(self):
+        """((row_letter, (SeatRecord, ...)), ...) in display order."""
+        return self._rows
+
+    def mask(self, seat_ids):
+        mask = 0
+        for seat_id in seat_ids:
+            mask |= 1 << seat_id
+        return mask
+
+    def eligible_mask(self, role):
+        return self._level_masks.get(role_level(role), 0)
+
+    def is_eligible(self, role, seat_id):
+        return (self.eligible_mask(role) >> seat_id) & 1 == 1
+
+    def free_counts(self, booked_bits):
+        """{restriction class: free seats} given a booked-seat bitset."""
+        return {restricted: bin(mask & ~booked_bits).count('1')
+                for restricted, mask in self._class_masks.items()}
+
+    def unknown(self, seat_ids):
+        return [sid for sid in seat_ids if sid not in self._by_id]
+
+    def ineligible(self, role, seat_ids):
+        """Seat ids from seat_ids the role may not book (empty list if all allowed)."""
+        denied = self.mask(seat_ids) & ~self.eligible_mask(role)
+        if not denied:
+            return []
+        return [sid for sid in seat_ids if (denied >> sid) & 1]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def load_seat_catalog():
+    """(Re)build the process-wide catalog; call inside an app context."""
+    global _catalog
+    catalog = SeatCatalog.from_db()
+    with _catalog_lock:
+        _catalog = catalog
+    return catalog
+
+
+def get_seat_catalog():
+    catalog = _catalog
+    if catalog is None or not len(catalog):
+        catalog = load_seat_catalog()
+    return catalog
@@ -0,0 +1,160 @@
+import json
+import queue
+import threading
+import time
+
+from app.seat_cache import SeatAvailability, seat_availability
+
+# Sentinel queued when a showtime is deleted; the stream sends `closed` and ends.
+_CLOSED = object()
+
+
+def _sse(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class _Subscriber:
+    __slots__ = ('showtime_id', 'queue', 'stale')
+
+    def __init__(self, showtime_id, maxsize):
+        self.showtime_id = showtime_id
+        self.queue = queue.Queue(maxsize)
+        self.stale = False  # fell behind; send a fresh snapshot instead of the missed deltas
+
+
+class SeatEventHub:
+    """
+    Fans seat changes out to the SSE streams of this process.
+
+    The hub listens to seat_availability, so a booking or cancellation made
+    by this worker is one dict lookup plus a put_nowait per subscriber, with
+    no database work. Bookings made by other gunicorn workers are picked up
+    by one watcher thread that refreshes seat_availability for the showtimes
+    somebody is watching: one query per showtime every SEAT_CACHE_TTL
+    seconds, however many clients are connected.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+        self._subscribers = {}  # showtime id -> set of _Subscriber
+        self._watcher = None
+        seat_availability.add_listener(self._on_change)
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions['seat_events'] = self
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, showtime_id):
+        return self.try_subscribe(showtime_id)
+
+    def try_subscribe(self, showtime_id, limit=None):
+        """
+        Register a stream for the showtime, or return None when the process
+        already has `limit` streams; checked and registered under one lock,
+        so concurrent connects cannot overshoot the cap.
+        """
+        sub = _Subscriber(showtime_id, self._app.config.get('SEAT_STREAM_QUEUE_SIZE', 64))
+        with self._lock:
+            if limit is not None and sum(len(subs) for subs in self._subscribers.values()) >= limit:
+                return None
+            self._subscribers.setdefault(showtime_id, set()).add(sub)
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(target=self._watch, name='seat-events-watch', daemon=True)
+                self._watcher.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.showtime_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.showtime_id]
+
+    def _on_change(self, showtime_id, old, new):
+        with self._lock:
+            subs = list(self._subscribers.get(showtime_id, ()))
+        if not subs:
+            return
+        if new is None:
+            message = _CLOSED
+        else:
+            changed = old.bits ^ new.bits
+            message = _sse('seats', {
+                'version': new.version,
+                'taken': list(SeatAvailability(changed & new.bits)),
+                'released': list(SeatAvailability(changed & old.bits)),
+            }, new.version)
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(message)
+            except queue.Full:
+                sub.stale = True
+
+    def _watch(self):
+        interval = max(self._app.config.get('SEAT_CACHE_TTL', 2.0), 0.5)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                showtime_ids = list(self._subscribers)
+                if not showtime_ids:
+                    self._watcher = None
+                    return
+            with self._app.app_context():
+                for showtime_id in showtime_ids:
+                    try:
+                        seat_availability.get(showtime_id)
+                    except Exception as e:
+                        self._app.logger.warning("seat stream refresh failed for showtime %s: %s", showtime_id, e)
+
+    def stream(self, sub, snapshot):
+        """
+        Generator of SSE text for one client: the snapshot first, then
+        deltas as they arrive, heartbeats while idle. Ends after
+        SEAT_STREAM_MAX_SECONDS so the worker thread is handed back; the
+        browser reconnects on its own and gets a new snapshot.
+        """
+        config = self._app.config
+        heartbeat = config.get('SEAT_STREAM_HEARTBEAT', 15)
+        deadline = time.monotonic() + config.get('SEAT_STREAM_MAX_SECONDS', 300)
+        try:
+            yield f"retry: {int(config.get('SEAT_STREAM_RETRY_MS', 3000))}\n"
+            yield self.snapshot_event(snapshot)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if sub.stale:
+                    sub.stale = False
+                    with sub.queue.mutex:
+                        sub.queue.queue.clear()
+                    current = seat_availability.peek(sub.showtime_id)
+                    if current is not None:
+                        yield self.snapshot_event(current)
+                try:
+                    message = sub.queue.get(timeout=min(heartbeat, remaining))
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is _CLOSED:
+                    yield _sse('closed', {'showtime_id': sub.showtime_id})
+                    return
+                yield message
+        finally:
+            self.unsubscribe(sub)
+
+    @staticmethod
+    def snapshot_event(entry):
+        return _sse('snapshot', {'version': entry.version, 'booked': list(entry)}, entry.version)
+
+
+seat_events = SeatEventHub()
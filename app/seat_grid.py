@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+from markupsafe import Markup
+
+from app.metrics import Counter, REGISTRY
+from app.seat_catalog import role_level
+
+FREE, BOOKED, RESTRICTED = 'free', 'booked', 'restricted'
+
+GridCell = namedtuple('GridCell', 'id label state allowed')  # allowed: offered to the role once free
+
+SEAT_GRID_CACHE_LOOKUPS = Counter('sandhika_seat_grid_cache_total', 'Booking-page seat grid renders, by outcome.',
+                                  ('outcome',))
+REGISTRY.append(SEAT_GRID_CACHE_LOOKUPS)
+
+
+def build_seat_grid(catalog, taken_bits, role, held_ids=()):
+    """
+    The booking grid as [(row, [GridCell or None per column])], in catalog
+    row order, each seat already FREE, BOOKED or RESTRICTED for `role`.
+    Seats in held_ids (the viewer's own holds) count as free.
+    """
+    offered = catalog.eligible_mask(role)
+    taken = taken_bits & ~catalog.mask(held_ids)
+    columns = max((s.number for s in catalog), default=0)
+    grid = []
+    for row, seats in catalog.rows():
+        cells = [None] * columns
+        for s in seats:
+            if s.number < 1:
+                continue
+            allowed = (offered >> s.id) & 1 == 1
+            if (taken >> s.id) & 1:
+                state = BOOKED
+            elif not allowed:
+                state = RESTRICTED
+            else:
+                state = FREE
+            cells[s.number - 1] = GridCell(s.id, s.label, state, allowed)
+        grid.append((row, cells))
+    return grid
+
+
+def _render(grid, held_ids):
+    # Straight from the Jinja env: the fragment needs no request context processors
+    template = current_app.jinja_env.get_template('seat_grid.html')
+    return Markup(template.render(grid=grid, held_ids=set(held_ids)))
+
+
+class SeatGridCache:
+    """
+    Rendered grid HTML per (showtime, role level), kept while the showtime's
+    taken-seat bitset and the seat catalog stay the same; a new bitset
+    replaces the entry. Viewers holding seats get their own uncached render,
+    since their holds show as selected. At most SEAT_GRID_CACHE_SIZE entries
+    are kept per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (showtime_id, level) -> (bits, fingerprint, html)
+
+    def render(self, catalog, showtime_id, taken_bits, role, held_ids=()):
+        if held_ids:
+            SEAT_GRID_CACHE_LOOKUPS.inc(outcome='bypass')
+            return _render(build_seat_grid(catalog, taken_bits, role, held_ids), held_ids)
+
+        key = (showtime_id, role_level(role))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == taken_bits and entry[1] == catalog.fingerprint:
+                self._entries.move_to_end(key)
+                SEAT_GRID_CACHE_LOOKUPS.inc(outcome='hit')
+                return entry[2]
+
+        SEAT_GRID_CACHE_LOOKUPS.inc(outcome='miss')
+        html = _render(build_seat_grid(catalog, taken_bits, role), ())
+        with self._lock:
+            self._entries[key] = (taken_bits, catalog.fingerprint, html)
+            self._entries.move_to_end(key)
+            while len(self._entries) > current_app.config.get('SEAT_GRID_CACHE_SIZE', 256):
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+seat_grid_cache = SeatGridCache()
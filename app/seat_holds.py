@@ -0,0 +1,176 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+from app.booking_engine import begin_immediate
+from app.extensions import db
+from app.models import BookingSeat, SeatHold
+from app.seat_cache import seat_availability
+
+
+class HoldResult:
+    """Outcome of place_hold(): the hold's expiry, or why it was refused."""
+    __slots__ = ('expires_at', 'reason')
+
+    def __init__(self, expires_at=None, reason=None):
+        self.expires_at = expires_at
+        self.reason = reason
+
+    @property
+    def ok(self):
+        return self.expires_at is not None
+
+    def __repr__(self):
+        if self.ok:
+            return f"<HoldResult until={self.expires_at:%H:%M:%S}>"
+        return f"<HoldResult {self.reason}>"
+
+
+def place_hold(user_id, showtime_id, seat_id, seconds, max_per_user):
+    """
+    Hold one seat for `seconds`, or extend the user's own hold on it.
+    Refused with reason 'booked', 'held' (another user's live hold) or
+    'too_many' (the user already holds max_per_user seats for the show).
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    try:
+        begin_immediate()
+        if db.session.query(BookingSeat.id).filter_by(showtime_id=showtime_id, seat_id=seat_id).first():
+            db.session.rollback()
+            return HoldResult(reason='booked')
+
+        hold = SeatHold.query.filter_by(showtime_id=showtime_id, seat_id=seat_id).first()
+        if hold is not None and hold.user_id != user_id and hold.expires_at > now:
+            db.session.rollback()
+            return HoldResult(reason='held')
+        if hold is None or hold.user_id != user_id:
+            held = (db.session.query(db.func.count(SeatHold.id))
+                    .filter(SeatHold.user_id == user_id, SeatHold.showtime_id == showtime_id,
+                            SeatHold.expires_at > now).scalar())
+            if held >= max_per_user:
+                db.session.rollback()
+                return HoldResult(reason='too_many')
+
+        if hold is None:
+            hold = SeatHold(showtime_id=showtime_id, seat_id=seat_id)
+            db.session.add(hold)
+        hold.user_id = user_id  # an expired hold of someone else is taken over in place
+        hold.expires_at = expires_at
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    seat_availability.mark_booked(showtime_id, [seat_id])
+    hold_sweeper.push(expires_at, showtime_id, seat_id)
+    return HoldResult(expires_at=expires_at)
+
+
+def release_hold(user_id, showtime_id, seat_id):
+    """Drop the user's hold on a seat; returns False if there was none."""
+    deleted = (SeatHold.query
+               .filter_by(user_id=user_id, showtime_id=showtime_id, seat_id=seat_id)
+               .delete(synchronize_session=False))
+    db.session.commit()
+    if deleted:
+        seat_availability.mark_released(showtime_id, [seat_id])
+    return bool(deleted)
+
+
+def user_holds(user_id, showtime_id):
+    """Seat ids the user currently holds for the showtime."""
+    rows = (db.session.query(SeatHold.seat_id)
+            .filter(SeatHold.user_id == user_id, SeatHold.showtime_id == showtime_id,
+                    SeatHold.expires_at > datetime.utcnow()))
+    return [seat_id for (seat_id,) in rows]
+
+
+class HoldSweeper:
+    """
+    Expires holds in the background. Holds placed by this worker sit in a
+    min-heap keyed by expiry, so the thread sleeps until the next one is
+    due and deletes exactly that row. Every SEAT_HOLD_SWEEP_INTERVAL it
+    also range-deletes on the expires_at index, which catches holds left by
+    workers that have since exited. Readers already ignore expired rows;
+    the sweep only keeps the table small and the availability cache and
+    live seat streams current.
+    """
+
+    def __init__(self):
+        self._app = None
+        self._heap = []  # (expires_at, showtime_id, seat_id)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def init_app(self, app):
+        self._app = app
+        app.extensions['hold_sweeper'] = self
+
+    def push(self, expires_at, showtime_id, seat_id):
+        with self._cond:
+            heapq.heappush(self._heap, (expires_at, showtime_id, seat_id))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='seat-hold-sweeper', daemon=True)
+                self._thread.start()
+            elif self._heap[0][0] == expires_at:
+                self._cond.notify()
+
+    def _pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    def _run(self):
+        interval = self._app.config.get('SEAT_HOLD_SWEEP_INTERVAL', 60)
+        next_sweep = datetime.utcnow()
+        while True:
+            with self._cond:
+                now = datetime.utcnow()
+                wake_at = min(self._heap[0][0], next_sweep) if self._heap else next_sweep
+                if wake_at > now:
+                    self._cond.wait((wake_at - now).total_seconds())
+                    continue
+                due = self._pop_due(now)
+            try:
+                with self._app.app_context():
+                    if due:
+                        self.expire(due, now)
+                    if now >= next_sweep:
+                        self.sweep(now)
+                        next_sweep = now + timedelta(seconds=interval)
+            except Exception as e:
+                self._app.logger.warning("seat hold sweep failed: %s", e)
+
+    @staticmethod
+    def expire(due, now):
+        begin_immediate()
+        released = []
+        for _, showtime_id, seat_id in due:
+            # A hold extended or converted to a booking since it was pushed no longer matches
+            deleted = (SeatHold.query
+                       .filter(SeatHold.showtime_id == showtime_id, SeatHold.seat_id == seat_id,
+                               SeatHold.expires_at <= now)
+                       .delete(synchronize_session=False))
+            if deleted:
+                released.append((showtime_id, seat_id))
+        db.session.commit()
+        for showtime_id, seat_id in released:
+            seat_availability.mark_released(showtime_id, [seat_id])
+
+    @staticmethod
+    def sweep(now):
+        begin_immediate()
+        expired = SeatHold.query.filter(SeatHold.expires_at <= now)
+        rows = expired.with_entities(SeatHold.showtime_id, SeatHold.seat_id).all()
+        if not rows:
+            db.session.rollback()
+            return
+        expired.delete(synchronize_session=False)
+        db.session.commit()
+        for showtime_id, seat_id in rows:
+            seat_availability.mark_released(showtime_id, [seat_id])
+
+
+hold_sweeper = HoldSweeper()
@@ -0,0 +1,41 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models import Booking, BookingSeat, Showtime, User
+from app.seat_catalog import get_seat_catalog
+
+SeatOccupant = namedtuple('SeatOccupant', 'user role email category')
+
+
+def showtimes_in_window(start, days):
+    """Showtimes with start <= date < start + days, earliest first, movie preloaded."""
+    end = start + timedelta(days=days)
+    return (Showtime.query.options(joinedload(Showtime.movie))
+            .filter(Showtime.date >= start, Showtime.date < end)
+            .order_by(Showtime.date, Showtime.time)
+            .all())
+
+
+def build_seat_maps(showtimes, seats=None):
+    """
+    Seat occupancy for many showtimes in a fixed number of queries: the seat
+    catalog once, and every booked seat joined to its user in one SELECT.
+
+    Returns {showtime: {"all_seats": [...], "booked_seat_ids": {seat_id: SeatOccupant}}}.
+    """
+    if seats is None:
+        seats = get_seat_catalog().seats
+    occupancy = {show.id: {} for show in showtimes}
+    if occupancy:
+        rows = (db.session.query(BookingSeat.showtime_id, BookingSeat.seat_id, Booking.booked_for,
+                                 User.full_name, User.role, User.email)
+                .join(Booking, Booking.id == BookingSeat.booking_id)
+                .join(User, User.id == Booking.user_id)
+                .filter(BookingSeat.showtime_id.in_(list(occupancy)))
+                .all())
+        for showtime_id, seat_id, booked_for, full_name, role, email in rows:
+            occupancy[showtime_id][seat_id] = SeatOccupant(full_name, role, email, booked_for)
+    return {show: {"all_seats": seats, "booked_seat_ids": occupancy[show.id]} for show in showtimes}
@@ -0,0 +1,38 @@
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+def _pragmas(config):
+    pragmas = [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS')),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE')),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE')),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None]
+
+
+def init_app(app):
+    """
+    Apply the SQLITE_* pragmas from Config to every new SQLite connection.
+    WAL lets page views keep reading while a booking commits; busy_timeout
+    makes writers wait for the lock instead of failing with 'database is locked'.
+    """
+    if not app.config.get('SQLITE_TUNING', True):
+        return
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = _pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,45 @@
+import time
+
+from flask import current_app
+
+# Boot-time breakdown for one worker: package import, create_app(), and the
+# first request it serves. Logged once after that request and compared with
+# STARTUP_BUDGET_SECONDS; bench_startup.py measures the same in a fresh
+# interpreter.
+
+PHASES = ('import', 'create_app', 'first_request')
+timings = {}
+
+
+def record(phase, seconds):
+    timings[phase] = seconds
+
+
+def report():
+    parts = ', '.join(f"{phase} {timings[phase]:.3f}s" for phase in PHASES if phase in timings)
+    return f"startup: {parts} (total {sum(timings.values()):.3f}s)"
+
+
+def over_budget(budget):
+    return budget is not None and sum(timings.values()) > budget
+
+
+def init_app(app):
+    state = {'pending': True}
+
+    @app.before_request
+    def _start_first_request():
+        if state['pending']:
+            state['started'] = time.perf_counter()
+
+    @app.teardown_request
+    def _finish_first_request(exc):
+        if not state['pending'] or 'started' not in state:
+            return
+        state['pending'] = False
+        record('first_request', time.perf_counter() - state.pop('started'))
+        budget = current_app.config.get('STARTUP_BUDGET_SECONDS')
+        if over_budget(budget):
+            current_app.logger.warning("%s exceeds the %.1fs budget", report(), budget)
+        else:
+            current_app.logger.info(report())
@@ -0,0 +1,123 @@
+import random
+from datetime import date, time as dtime, timedelta
+
+from app.extensions import db
+from app.models import User, Dependent, Movie, Showtime, Booking, BookingSeat
+from app.seat_catalog import get_seat_catalog
+
+# Synthetic fixtures for local capacity testing and benchmarks. Every loader
+# takes a random.Random so the same seed always produces the same rows, and
+# writes with Core executemany in batches instead of ORM objects.
+
+ROLES = ('junior', 'senior', 'officer')
+SHOW_TIMES = (dtime(15, 0), dtime(18, 0), dtime(21, 0))
+BATCH_SIZE = 5000
+
+
+def _insert(table, rows, batch_size=BATCH_SIZE):
+    conn = db.session.connection()
+    for i in range(0, len(rows), batch_size):
+        conn.execute(table.insert(), rows[i:i + batch_size])
+    return len(rows)
+
+
+def _next_id(column):
+    return (db.session.query(db.func.max(column)).scalar() or 0) + 1
+
+
+def seed_users(count, rng, batch_size=BATCH_SIZE):
+    first = _next_id(User.id)
+    rows = [{"id": first + i, "full_name": f"Synthetic User {first + i}",
+             "email": f"synthetic{first + i}@example.com", "password": "!",  # no password can match
+             "role": rng.choice(ROLES), "is_approved": True} for i in range(count)]
+    return _insert(User.__table__, rows, batch_size)
+
+
+def seed_dependents(rng, max_per_user=2, batch_size=BATCH_SIZE):
+    """0..max_per_user dependents for every user that has none yet."""
+    has_dependents = db.session.query(Dependent.user_id).distinct()
+    user_ids = [uid for (uid,) in db.session.query(User.id).filter(~User.id.in_(has_dependents))
+                .order_by(User.id)]
+    rows = [{"user_id": uid, "name": f"Dependent {n + 1} of {uid}", "age": rng.randint(1, 70),
+             "is_approved": rng.random() < 0.8}
+            for uid in user_ids for n in range(rng.randint(0, max_per_user))]
+    return _insert(Dependent.__table__, rows, batch_size)
+
+
+def seed_movies(count, rng, batch_size=BATCH_SIZE):
+    first = _next_id(Movie.id)
+    rows = [{"id": first + i, "title": f"Synthetic Movie {first + i}", "description": "Synthetic",
+             "duration": rng.randint(90, 180)} for i in range(count)]
+    return _insert(Movie.__table__, rows, batch_size)
+
+
+def seed_showtimes(count, rng, start=None, batch_size=BATCH_SIZE):
+    """len(SHOW_TIMES) shows a day, centred on `start` (default today), for existing movies."""
+    movie_ids = [mid for (mid,) in db.session.query(Movie.id).order_by(Movie.id)]
+    if not movie_ids:
+        return 0
+    per_day = len(SHOW_TIMES)
+    first_day = (start or date.today()) - timedelta(days=count // per_day // 2)
+    rows = [{"movie_id": rng.choice(movie_ids), "date": first_day + timedelta(days=i // per_day),
+             "time": SHOW_TIMES[i % per_day]} for i in range(count)]
+    return _insert(Showtime.__table__, rows, batch_size)
+
+
+def seed_bookings(count, rng, batch_size=BATCH_SIZE):
+    """
+    Spread `count` bookings evenly over existing showtimes. Each takes 1-3
+    free seats its user's role may book; shows that fill up get fewer.
+    """
+    catalog = get_seat_catalog()
+    users = db.session.query(User.id, User.role).filter(User.is_approved.is_(True)).order_by(User.id).all()
+    showtime_ids = [sid for (sid,) in db.session.query(Showtime.id).order_by(Showtime.id)]
+    if not users or not showtime_ids:
+        return 0, 0
+
+    taken, booked = {}, set()
+    for showtime_id, seat_id in db.session.query(BookingSeat.showtime_id, BookingSeat.seat_id):
+        taken.setdefault(showtime_id, set()).add(seat_id)
+    for user_id, showtime_id in db.session.query(Booking.user_id, Booking.showtime_id):
+        booked.add((user_id, showtime_id))
+    eligible = {role: [s.id for s in catalog if catalog.is_eligible(role, s.id)] for role in ROLES}
+
+    first = _next_id(Booking.id)
+    booking_rows, seat_rows = [], []
+    per_show, extra = divmod(count, len(showtime_ids))
+    for n, showtime_id in enumerate(showtime_ids):
+        show_taken = taken.setdefault(showtime_id, set())
+        wanted = per_show + (1 if n < extra else 0)
+        for user_id, role in rng.sample(users, min(wanted, len(users))):
+            if (user_id, showtime_id) in booked:
+                continue
+            free = [sid for sid in eligible.get((role or '').lower(), eligible['junior']) if sid not in show_taken]
+            if not free:
+                continue
+            seats = rng.sample(free, min(len(free), rng.randint(1, 3)))
+            show_taken.update(seats)
+            booking_id = first + len(booking_rows)
+            guests = len(seats) - 1 if len(seats) > 1 and rng.random() < 0.3 else 0
+            booking_rows.append({"id": booking_id, "user_id": user_id, "showtime_id": showtime_id,
+                                 "seat_numbers": ",".join(map(str, seats)), "extra_guests": guests,
+                                 "payment_status": "Pay at Counter" if guests else "Not Required",
+                                 "status": "confirmed", "booked_for": "Self"})
+            seat_rows.extend({"showtime_id": showtime_id, "seat_id": sid, "booking_id": booking_id}
+                             for sid in seats)
+    _insert(Booking.__table__, booking_rows, batch_size)
+    _insert(BookingSeat.__table__, seat_rows, batch_size)
+    return len(booking_rows), len(seat_rows)
+
+
+def seed_synthetic(users=5000, showtimes=2000, bookings=100000, movies=40, seed=1,
+                   start=None, batch_size=BATCH_SIZE):
+    """Load a whole synthetic population and commit; returns row counts."""
+    rng = random.Random(seed)
+    counts = {
+        "users": seed_users(users, rng, batch_size),
+        "dependents": seed_dependents(rng, batch_size=batch_size),
+        "movies": seed_movies(movies, rng, batch_size),
+        "showtimes": seed_showtimes(showtimes, rng, start, batch_size),
+    }
+    counts["bookings"], counts["booking_seats"] = seed_bookings(bookings, rng, batch_size)
+    db.session.commit()
+    return counts
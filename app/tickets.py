@@ -0,0 +1,304 @@
+import atexit
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing, contextmanager
+from io import BytesIO
+
+from flask import current_app, render_template
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.metrics import Histogram, REGISTRY
+from app.models import Booking, Showtime
+from app.pdf_cache import pdf_cache
+from app.seat_catalog import get_seat_catalog
+from app.utils import html_to_pdf, pdf_static_folder
+
+TICKET_BATCH_SECONDS = Histogram('sandhika_ticket_batch_seconds', 'Wall time per bulk ticket run.', ('format',),
+                                 buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+REGISTRY.append(TICKET_BATCH_SECONDS)
+
+BATCH_FORMATS = {
+    'pdf': ('application/pdf', 'pdf'),
+    'zip': ('application/zip', 'zip'),
+}
+
+
+def ticket_context(booking, catalog):
+    """
+    Template context, cache key and file name of one booking's ticket.
+    download_ticket and bulk runs both use it, so their PDFs are the same.
+    Plain values only: the context can cross a process boundary.
+    """
+    showtime, movie = booking.showtime, booking.showtime.movie
+    seat_labels = [catalog.label(bs.seat_id) for bs in booking.seats]
+
+    # "ticket_for" summary (no DB change needed)
+    total = len(seat_labels)
+    guests = int(booking.extra_guests or 0)
+    has_self = (total - guests) >= 1  # assume user included if at least 1 seat left after guests
+    dependents = max(0, total - guests - (1 if has_self else 0))
+    parts = []
+    if has_self:
+        parts.append("Self")
+    if dependents > 0:
+        parts.append(f"{dependents} Dependent{'s' if dependents > 1 else ''}")
+    if guests > 0:
+        parts.append(f"{guests} Guest{'s' if guests > 1 else ''}")
+    ticket_for = " + ".join(parts) if parts else "—"
+
+    ctx = {
+        "booking": {"id": booking.id, "payment_status": booking.payment_status, "status": booking.status},
+        "showtime": {"id": showtime.id, "date": showtime.date, "time": showtime.time},
+        "movie": {"id": movie.id, "title": movie.title},
+        "seat_labels": seat_labels,
+        "ticket_for": ticket_for,
+    }
+    # Everything the ticket shows goes into the key, so any change re-renders
+    etag = pdf_cache.key(
+        "ticket_pdf.html", booking.id, booking.payment_status, booking.status,
+        showtime.id, showtime.date, showtime.time, movie.id, movie.title,
+        seat_labels, ticket_for,
+    )
+    return ctx, etag, f"Ticket_{movie.title.replace(' ', '_')}.pdf"
+
+
+# ---------- Bulk runs ----------
+# POST starts a run in a thread of the worker that took the request; xhtml2pdf
+# itself runs in a ProcessPoolExecutor of at most TICKET_BATCH_WORKERS
+# processes, capped by the CPUs this process may use. Runs share the pool
+# while any is going; it is shut down TICKET_BATCH_POOL_IDLE seconds after
+# the last one ends, and at exit, so idle web workers keep no renderers.
+# Progress and the finished file live in <instance>/ticket_batches/<id>/, so
+# any gunicorn worker can answer the polling and the download.
+
+_pool = None
+_pool_users = 0
+_idle_timer = None
+_pool_lock = threading.Lock()
+
+
+def usable_cpus():
+    """CPUs this process may run on: affinity, then a cgroup v2 quota (cpu.max) if one is set."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _warm_worker():
+    from xhtml2pdf import pisa  # noqa: F401  (pay the import once per process, not on the first ticket)
+
+
+def _shutdown_pool(only_if_idle=False):
+    global _pool, _idle_timer
+    with _pool_lock:
+        if _pool is None or (only_if_idle and _pool_users):
+            return
+        pool, _pool, _idle_timer = _pool, None, None
+    pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(_shutdown_pool)
+
+
+@contextmanager
+def _leased_pool(workers, idle_seconds):
+    """The shared pool, created on demand; the last run to leave arms the idle shutdown."""
+    global _pool, _pool_users, _idle_timer
+    with _pool_lock:
+        if _idle_timer is not None:
+            _idle_timer.cancel()
+            _idle_timer = None
+        if _pool is None:
+            # Not fork: the parent is a threaded web worker
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_warm_worker)
+        _pool_users += 1
+        pool = _pool
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _pool_users -= 1
+            if not _pool_users and _pool is not None:
+                _idle_timer = threading.Timer(idle_seconds, _shutdown_pool, kwargs={'only_if_idle': True})
+                _idle_timer.daemon = True
+                _idle_timer.start()
+
+
+def _discard_pool(pool):
+    # A dead child breaks the whole executor; the next run gets a fresh one
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _pool_results(workers, idle_seconds, pending, static_folder):
+    """Yield (index, pdf) as the pool finishes them; one retry on a fresh pool if a child dies."""
+    remaining = dict(pending)
+    for attempt in (1, 2):
+        with _leased_pool(workers, idle_seconds) as pool:
+            try:
+                futures = {pool.submit(html_to_pdf, html, static_folder): i
+                           for i, (html, _) in remaining.items()}
+                for f in as_completed(futures):
+                    i = futures[f]
+                    pdf = f.result()
+                    del remaining[i]
+                    yield i, pdf
+                return
+            except BrokenProcessPool:
+                _discard_pool(pool)
+        if attempt == 2:
+            raise RuntimeError("a ticket renderer process died twice; try again later")
+        current_app.logger.warning("ticket renderer process died; retrying %d tickets on a new pool",
+                                   len(remaining))
+
+
+def _batches_dir():
+    path = current_app.config.get('TICKET_BATCH_DIR') or os.path.join(current_app.instance_path, 'ticket_batches')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _write_status(job_dir, **status):
+    status['updated_at'] = time.time()
+    fd, tmp = tempfile.mkstemp(dir=job_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp, os.path.join(job_dir, 'status.json'))
+
+
+def batch_status(job_id):
+    """The run's status dict, or None for an unknown id."""
+    if not job_id.isalnum():
+        return None
+    try:
+        with open(os.path.join(_batches_dir(), job_id, 'status.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def batch_output(job_id):
+    """Path of a finished run's file, or None."""
+    status = batch_status(job_id)
+    if not status or status.get('state') != 'done':
+        return None
+    return os.path.join(_batches_dir(), job_id, status['filename'])
+
+
+def _prune(root, keep_seconds):
+    cutoff = time.time() - keep_seconds
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def start_batch(showtime_id, fmt):
+    """Queue a run for the showtime's tickets; returns its id."""
+    app = current_app._get_current_object()
+    root = _batches_dir()
+    _prune(root, app.config.get('TICKET_BATCH_KEEP_SECONDS', 3600))
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(root, job_id)
+    os.makedirs(job_dir)
+    _write_status(job_dir, state='queued', showtime_id=showtime_id, format=fmt, done=0, total=0)
+    threading.Thread(target=_run_batch, args=(app, job_dir, showtime_id, fmt),
+                     name=f'ticket-batch-{job_id[:8]}', daemon=True).start()
+    return job_id
+
+
+def _run_batch(app, job_dir, showtime_id, fmt):
+    started = time.perf_counter()
+    with app.app_context():
+        try:
+            _render_batch(app, job_dir, showtime_id, fmt)
+        except Exception as e:
+            app.logger.warning("ticket batch for showtime %s failed: %s", showtime_id, e)
+            _write_status(job_dir, state='failed', showtime_id=showtime_id, format=fmt, error=str(e)[:300])
+        finally:
+            TICKET_BATCH_SECONDS.observe(time.perf_counter() - started, format=fmt)
+
+
+def _render_batch(app, job_dir, showtime_id, fmt):
+    catalog = get_seat_catalog()
+    position = {seat.id: i for i, seat in enumerate(catalog)}
+    bookings = (Booking.query.options(joinedload(Booking.showtime).joinedload(Showtime.movie),
+                                      selectinload(Booking.seats))
+                .filter(Booking.showtime_id == showtime_id).all())
+    # Seat order, so the printed stack matches the hall
+    bookings.sort(key=lambda b: min((position.get(bs.seat_id, len(position)) for bs in b.seats), default=0))
+    total = len(bookings)
+    status = dict(showtime_id=showtime_id, format=fmt, total=total)
+    _write_status(job_dir, state='running', done=0, **status)
+
+    pdfs = [None] * total
+    names = [None] * total
+    pending = {}  # index -> (html, etag)
+    for i, booking in enumerate(bookings):
+        ctx, etag, _ = ticket_context(booking, catalog)
+        names[i] = f"{i + 1:03d}_{'-'.join(ctx['seat_labels']) or booking.id}_booking{booking.id}.pdf"
+        pdfs[i] = pdf_cache.get(showtime_id, booking.id, etag)
+        if pdfs[i] is None:
+            pending[i] = (render_template("ticket_pdf.html", **ctx), etag)
+    done = total - len(pending)
+    _write_status(job_dir, state='running', done=done, **status)
+
+    static_folder = pdf_static_folder()
+    workers = min(app.config.get('TICKET_BATCH_WORKERS', 2), usable_cpus(), len(pending))
+    if workers <= 1:
+        # A one-process pool only adds the spawn and pickling cost
+        results = ((i, html_to_pdf(html, static_folder)) for i, (html, _) in pending.items())
+    else:
+        results = _pool_results(workers, app.config.get('TICKET_BATCH_POOL_IDLE', 60), pending, static_folder)
+    # closing(): a failed ticket must still hand the pool lease back
+    with closing(results):
+        for i, pdf in results:
+            if pdf is None:
+                raise RuntimeError(f"could not render the ticket of booking {bookings[i].id}")
+            pdfs[i] = pdf
+            pdf_cache.put(showtime_id, bookings[i].id, pending[i][1], pdf)
+            done += 1
+            _write_status(job_dir, state='running', done=done, **status)
+
+    showtime = bookings[0].showtime if bookings else Showtime.query.get(showtime_id)
+    filename = f"Tickets_{showtime.date:%Y%m%d}_{showtime.time:%H%M}_{showtime_id}.{BATCH_FORMATS[fmt][1]}"
+    tmp = os.path.join(job_dir, filename + '.tmp')
+    if fmt == 'zip':
+        with zipfile.ZipFile(tmp, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, pdf in zip(names, pdfs):
+                zf.writestr(name, pdf)
+    else:
+        from pypdf import PdfWriter
+        writer = PdfWriter()
+        for pdf in pdfs:
+            writer.append(BytesIO(pdf))
+        with open(tmp, 'wb') as f:
+            writer.write(f)
+    os.replace(tmp, os.path.join(job_dir, filename))
+    _write_status(job_dir, state='done', done=done, filename=filename, **status)
@@ -1,21 +1,16 @@
 # app/utils.py
-from flask import current_app, render_template, make_response
+from flask import current_app, render_template, make_response, request, stream_with_context
 from flask_mail import Message
 from app.extensions import mail
+from app.metrics import timed
 
 # ---------- email helpers ----------
-def _send(msg: Message, retries: int = 2, delay: float = 2.0) -> bool:
-    import time
-    for attempt in range(retries + 1):
-        try:
-            mail.send(msg)
-            print(f"✅ Email sent to {msg.recipients}")
-            return True
-        except Exception as e:
-            print(f"❌ Email send failed (attempt {attempt + 1}/{retries + 1}): {e}")
-            if attempt < retries:
-                time.sleep(delay)
-    return False
+def _send(msg: Message) -> bool:
+    """Queue the message in the outbox; app.outbox delivers it in the background."""
+    from app.outbox import enqueue_email
+    with timed('mail'):
+        enqueue_email(msg)
+    return True
 
 def send_otp_email(to_email: str, otp: str) -> bool:
     subject = "Your OTP for Sandhika Movie Booking"
@@ -49,31 +44,70 @@ def send_dependent_approval_email(user_email: str, user_name: str, dependent_nam
     return _send(msg)
 
 # ---------- PDF (xhtml2pdf) helpers ----------
+# xhtml2pdf and reportlab take ~0.5s to import; they are loaded on the first render, not at boot
 import os
+from functools import partial
 from io import BytesIO
 from urllib.parse import urlparse
-from xhtml2pdf import pisa
 
-def _pdf_link_callback(uri: str, rel) -> str:
+def pdf_static_folder() -> str:
+    return os.path.join(current_app.root_path, "..", "static")
+
+def _resolve_pdf_uri(static_folder: str, uri: str, rel) -> str:
     parsed = urlparse(uri)
     if parsed.scheme in ("http", "https"):
         return uri
-    static_folder = os.path.join(current_app.root_path, "..", "static")
     if uri.startswith("/static/"):
         return os.path.abspath(os.path.join(static_folder, uri.replace("/static/", "", 1)))
     return os.path.abspath(os.path.join(static_folder, uri))
 
-def render_pdf_from_template(template_name: str, **ctx):
-    html = render_template(template_name, **ctx)
+def html_to_pdf(html: str, static_folder: str):
+    """
+    The xhtml2pdf half of render_pdf_from_template. Needs no app context,
+    so a process pool can run it (app.tickets); None on failure.
+    """
+    from xhtml2pdf import pisa
     buf = BytesIO()
-    result = pisa.CreatePDF(html, dest=buf, link_callback=_pdf_link_callback, encoding="utf-8")
+    result = pisa.CreatePDF(html, dest=buf, link_callback=partial(_resolve_pdf_uri, static_folder),
+                            encoding="utf-8")
     if result.err:
         return None
     return buf.getvalue()
 
-def make_pdf_response(pdf_bytes, filename="document.pdf", inline=True):
+def render_pdf_from_template(template_name: str, **ctx):
+    html = render_template(template_name, **ctx)
+    with timed('pdf'):
+        return html_to_pdf(html, pdf_static_folder())
+
+def make_pdf_response(pdf_bytes, filename="document.pdf", inline=True, etag=None):
+    """
+    pdf_bytes may be bytes or a zero-arg callable that renders them; with an
+    etag the callable is skipped entirely when the client already has it (304).
+    """
     dispo = "inline" if inline else "attachment"
-    resp = make_response(pdf_bytes)
-    resp.headers["Content-Type"] = "application/pdf"
-    resp.headers["Content-Disposition"] = f'{dispo}; filename="{filename}"'
+    if etag and etag in request.if_none_match:
+        resp = make_response("", 304)
+    else:
+        if callable(pdf_bytes):
+            pdf_bytes = pdf_bytes()
+        if not pdf_bytes:
+            return "Error generating PDF", 500
+        resp = make_response(pdf_bytes)
+        resp.headers["Content-Type"] = "application/pdf"
+        resp.headers["Content-Disposition"] = f'{dispo}; filename="{filename}"'
+    if etag:
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = f"private, max-age={current_app.config.get('PDF_CACHE_MAX_AGE', 0)}, must-revalidate"
     return resp
+
+def stream_template_buffered(template_name: str, buffer_size: int = 200, **ctx):
+    """
+    Like flask.stream_template, but hands the server buffer_size template
+    events per write instead of every few bytes, so a long table streams in
+    a handful of chunks rather than tens of thousands.
+    """
+    app = current_app._get_current_object()
+    app.update_template_context(ctx)
+    stream = app.jinja_env.get_template(template_name).stream(ctx)
+    stream.enable_buffering(buffer_size)
+    return stream_with_context(stream)
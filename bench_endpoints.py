@@ -0,0 +1,203 @@
+"""
+Endpoint benchmark over a synthetic population.
+
+Builds the app with create_app() against a throwaway SQLite database, loads
+app.synthetic.seed_synthetic(), then times book_tickets, my_bookings,
+download_ticket, admin_seats and admin_summary through the Flask test client.
+Reports p50/p95/p99 latency and SQL statements per request, and compares
+them with a stored baseline JSON.
+
+    python bench_endpoints.py --users 5000 --showtimes 2000 --bookings 100000
+    python bench_endpoints.py --save-baseline        # write bench_baseline.json
+    python bench_endpoints.py --baseline bench_baseline.json --tolerance 0.25
+
+Exits 1 when an endpoint's p95 is more than --tolerance slower than the
+baseline or it runs more queries than before.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+from config import Config
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def _config(tmpdir):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        PDF_CACHE_DIR = os.path.join(tmpdir, "pdf_cache")
+        OUTBOX_AUTOSTART = False
+        MAINTENANCE_AUTOSTART = False
+        TESTING = True
+    return BenchConfig
+
+
+def _percentiles(samples):
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+class Bench:
+    def __init__(self, app, rng):
+        self.app = app
+        self.rng = rng
+        self.client = app.test_client()
+        self.samples = {}
+        self.queries = {}
+
+    def login(self, user_id=None, admin=False):
+        with self.client.session_transaction() as sess:
+            sess.clear()
+            if admin:
+                sess["admin_logged_in"] = True
+            if user_id is not None:
+                sess["_user_id"] = str(user_id)
+                sess["_fresh"] = True
+
+    def hit(self, name, method, url, **kwargs):
+        from app.query_counter import count_queries
+        # Timed and counted up to the end of the body: streamed responses
+        # (admin_summary) do their work while it is read, after X-Query-Count is sent
+        with count_queries() as stats:
+            t0 = time.perf_counter()
+            resp = self.client.open(url, method=method, **kwargs)
+            resp.get_data()
+            elapsed = (time.perf_counter() - t0) * 1000
+        if resp.status_code >= 400:
+            raise RuntimeError(f"{name}: {method} {url} returned {resp.status_code}")
+        self.samples.setdefault(name, []).append(elapsed)
+        self.queries.setdefault(name, []).append(stats.count)
+        return resp
+
+    def report(self):
+        out = {}
+        for name, samples in self.samples.items():
+            p50, p95, p99 = _percentiles(samples)
+            out[name] = {"n": len(samples), "p50_ms": round(p50, 3), "p95_ms": round(p95, 3),
+                         "p99_ms": round(p99, 3), "queries": max(self.queries[name])}
+        return out
+
+
+def run(args):
+    from app import create_app, db
+    from app.models import Booking, Showtime, User
+    from app.seat_catalog import get_seat_catalog
+    from app.synthetic import seed_synthetic
+    from app.migrations import init_db
+
+    tmpdir = tempfile.mkdtemp(prefix="sandhika-bench-")
+    app = create_app(_config(tmpdir))
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        init_db()
+        t0 = time.perf_counter()
+        counts = seed_synthetic(users=args.users, showtimes=args.showtimes, bookings=args.bookings,
+                                seed=args.seed)
+        seed_seconds = time.perf_counter() - t0
+        today = date.today()
+        upcoming = (Showtime.query.filter(Showtime.date >= today)
+                    .order_by(Showtime.date, Showtime.time).first())
+        sample_bookings = [(b.id, b.user_id) for b in
+                           Booking.query.filter(Booking.showtime_id == upcoming.id).limit(args.repeat)]
+        booked_users = {uid for (uid,) in db.session.query(Booking.user_id)
+                        .filter(Booking.showtime_id == upcoming.id)}
+        catalog = get_seat_catalog()
+        free_seats = [s.id for s in catalog if catalog.is_eligible("officer", s.id)]
+        taken = {sid for (sid,) in db.session.execute(
+            db.text("SELECT seat_id FROM booking_seat WHERE showtime_id = :s"), {"s": upcoming.id})}
+        free_seats = [sid for sid in free_seats if sid not in taken]
+        fresh_users = [u.id for u in User.query.filter(User.role == "officer").limit(args.repeat * 4)
+                       if u.id not in booked_users][:args.repeat]
+        upcoming_id, movie_id = upcoming.id, upcoming.movie_id
+
+    bench = Bench(app, rng)
+    for booking_id, user_id in sample_bookings:
+        bench.login(user_id)
+        bench.hit("book_tickets GET", "GET", f"/user/book?movie_id={movie_id}&showtime_id={upcoming_id}")
+        bench.hit("my_bookings", "GET", "/user/my-bookings")
+        bench.hit("download_ticket (cold)", "GET", f"/user/download-ticket/{booking_id}")
+        bench.hit("download_ticket (warm)", "GET", f"/user/download-ticket/{booking_id}")
+
+    for user_id, seat_id in zip(fresh_users, free_seats):
+        bench.login(user_id)
+        bench.hit("book_tickets POST", "POST", "/user/book",
+                  data={"showtime_id": upcoming_id, "seat_ids": [str(seat_id)], "self_count": 1})
+
+    bench.login(admin=True)
+    for _ in range(args.repeat):
+        bench.hit("admin_seats", "GET", "/admin/admin/seats")
+        bench.hit("admin_summary (1 date)", "GET", f"/admin/admin/summary?date={today.isoformat()}")
+    for _ in range(max(1, args.repeat // 5)):
+        bench.hit("admin_summary (all)", "GET", "/admin/admin/summary")
+
+    return {"dataset": counts, "seed_seconds": round(seed_seconds, 2), "endpoints": bench.report()}
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f}ms -> {now['p95_ms']:.2f}ms")
+        if now["queries"] > before["queries"]:
+            regressions.append(f"{name}: queries {before['queries']} -> {now['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--showtimes", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    result = run(args)
+    data = result["dataset"]
+    print(f"dataset: {data['users']} users, {data['showtimes']} showtimes, {data['bookings']} bookings "
+          f"({data['booking_seats']} seats) seeded in {result['seed_seconds']}s")
+    print(f"{'endpoint':<26}{'n':>5}{'p50':>10}{'p95':>10}{'p99':>10}{'queries':>9}")
+    for name, r in result["endpoints"].items():
+        print(f"{name:<26}{r['n']:>5}{r['p50_ms']:>8.2f}ms{r['p95_ms']:>8.2f}ms{r['p99_ms']:>8.2f}ms{r['queries']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against (run with --save-baseline)")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"no regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
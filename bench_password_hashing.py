@@ -0,0 +1,102 @@
+"""
+Login throughput under different password hashing policies.
+
+For each method, builds the app against a throwaway SQLite database with
+PASSWORD_HASH_METHOD set to it, creates --users approved users whose
+stored hash uses --stored (default: the same method), then POSTs /login
+from --threads concurrent test clients and reports logins/s and p50/p95
+latency. With --stored set to an older method the first login of every
+user also pays for the rehash.
+
+    python bench_password_hashing.py
+    python bench_password_hashing.py --methods scrypt:16384:8:1 pbkdf2:sha256:200000 --threads 8
+    python bench_password_hashing.py --methods pbkdf2:sha256:200000 --stored scrypt:32768:8:1
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from config import Config
+
+PASSWORD = "Bench#Passw0rd"
+DEFAULT_METHODS = ["scrypt:32768:8:1", "scrypt:16384:8:1", "pbkdf2:sha256:600000", "pbkdf2:sha256:200000"]
+
+
+def _config(tmpdir, method):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        PASSWORD_HASH_METHOD = method
+        OUTBOX_AUTOSTART = False
+        MAINTENANCE_AUTOSTART = False
+        RATE_LIMIT_ENABLED = False
+        RATE_LIMIT_STORE = os.path.join(tmpdir, "rate_limit.db")
+        TESTING = True
+    return BenchConfig
+
+
+def bench(method, stored, users, threads, logins):
+    from werkzeug.security import generate_password_hash
+    from app import create_app, db
+    from app.migrations import init_db
+    from app.models import User
+
+    app = create_app(_config(tempfile.mkdtemp(prefix="sandhika-pw-"), method))
+    with app.app_context():
+        init_db()
+        pwhash = generate_password_hash(PASSWORD, method=stored)  # one salt for all: only the cost matters here
+        db.session.add_all(User(full_name=f"Bench {i}", email=f"bench{i}@example.com", password=pwhash,
+                                role="officer", is_approved=True) for i in range(users))
+        db.session.commit()
+
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    def worker(n):
+        client = app.test_client()
+        for i in range(n, logins, threads):
+            started = time.perf_counter()
+            resp = client.post("/login", data={"email": f"bench{i % users}@example.com", "password": PASSWORD})
+            elapsed = time.perf_counter() - started
+            client.get("/logout")
+            with lock:
+                latencies.append(elapsed)
+                if resp.status_code != 302 or "/login" in resp.headers.get("Location", ""):
+                    failures.append(resp.status_code)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {"rate": logins / wall, "p50": cuts[49], "p95": cuts[94], "failures": len(failures)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--stored", default=None, help="Method of the stored hashes (default: each --methods entry).")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.logins} logins over {args.threads} threads, {os.cpu_count()} CPUs")
+    print(f"{'method':<26}{'logins/s':>10}{'p50':>10}{'p95':>10}{'failed':>8}")
+    failed = False
+    for method in args.methods:
+        r = bench(method, args.stored or method, args.users, args.threads, args.logins)
+        print(f"{method:<26}{r['rate']:>10.1f}{r['p50'] * 1000:>8.1f}ms{r['p95'] * 1000:>8.1f}ms{r['failures']:>8}")
+        failed = failed or r["failures"] > 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Before/after benchmark for the SQLite performance profile (app.sqlite_profile
+pragmas + hot-path indexes) on admin_summary and book_tickets.
+
+Builds two throwaway databases with the same synthetic data: "before" has the
+hot-path indexes dropped and default pragmas, "after" runs the normal setup.
+
+    python bench_sqlite_profile.py --users 2000 --showtimes 500 --bookings-per-show 40
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date
+
+from config import Config
+
+HOT_PATH_INDEXES = ('ix_booking_showtime_id', 'ix_booking_user_id', 'ix_showtime_date',
+                    'ix_showtime_movie_id', 'ix_dependent_user_id', 'ix_otp_email')
+
+
+def _config(db_path, tuned):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        SQLITE_TUNING = tuned
+        SEAT_CACHE_TTL = 0          # measure the database, not the availability cache
+        OUTBOX_AUTOSTART = False
+        MAINTENANCE_AUTOSTART = False
+        TESTING = True
+    return BenchConfig
+
+
+def _timed(client, method, url, repeat, **kwargs):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        resp = client.open(url, method=method, **kwargs)
+        resp.get_data()  # admin_summary streams: the report runs while the body is read
+        samples.append((time.perf_counter() - t0) * 1000)
+        assert resp.status_code in (200, 302), (url, resp.status_code)
+    return statistics.median(samples), max(samples)
+
+
+# The statements behind those endpoints, timed directly so the index effect
+# is not drowned out by template rendering.
+HOT_QUERIES = {
+    "prior booking lookup": "SELECT id FROM booking WHERE user_id = :user_id AND showtime_id = :showtime_id",
+    "showtimes by date": "SELECT id FROM showtime WHERE date = :day",
+    "bookings of a showtime": "SELECT id, seat_numbers FROM booking WHERE showtime_id = :showtime_id",
+}
+
+
+def _time_queries(db, args, rng):
+    params = {"user_id": rng.randint(1, args.users), "showtime_id": args.showtimes // 2,
+              "day": date.today().isoformat()}
+    results = {}
+    for name, sql in HOT_QUERIES.items():
+        stmt = db.text(sql)
+        t0 = time.perf_counter()
+        for _ in range(args.repeat * 10):
+            db.session.execute(stmt, params).all()
+        results[f"sql (mean): {name}"] = ((time.perf_counter() - t0) * 1000 / (args.repeat * 10), 0.0)
+    return results
+
+
+def run_variant(label, tuned, args):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sandhika-bench-"), f"{label}.db")
+    from app import create_app, db
+    from app.synthetic import seed_synthetic
+    from app.migrations import init_db
+
+    app = create_app(_config(db_path, tuned))
+    rng = random.Random(args.seed)
+    with app.app_context():
+        init_db()
+        seed_synthetic(users=args.users, showtimes=args.showtimes, movies=20,
+                       bookings=args.showtimes * args.bookings_per_show, seed=args.seed)
+        if not tuned:
+            for name in HOT_PATH_INDEXES:
+                db.session.execute(db.text(f"DROP INDEX IF EXISTS {name}"))
+            db.session.commit()
+        journal = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+        results = _time_queries(db, args, rng)
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    results["admin_summary (all)"] = _timed(client, "GET", "/admin/admin/summary", args.repeat)
+    results["admin_summary (1 date)"] = _timed(client, "GET", f"/admin/admin/summary?date={date.today().isoformat()}",
+                                               args.repeat)
+
+    showtime_id = args.showtimes // 2
+    book_get, book_post = [], []
+    for i in range(args.repeat):
+        user_id = rng.randint(1, args.users)
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+        book_get.append(_timed(client, "GET", f"/user/book?movie_id=1&showtime_id={showtime_id}", 1)[0])
+        t0 = time.perf_counter()
+        client.post("/user/book", data={"showtime_id": showtime_id, "seat_ids": [str(1 + i % 60)],
+                                        "self_count": 1})
+        book_post.append((time.perf_counter() - t0) * 1000)
+    results["book_tickets GET"] = (statistics.median(book_get), max(book_get))
+    results["book_tickets POST"] = (statistics.median(book_post), max(book_post))
+    return journal, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--showtimes", type=int, default=500)
+    parser.add_argument("--bookings-per-show", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    before_journal, before = run_variant("before", False, args)
+    after_journal, after = run_variant("after", True, args)
+
+    print(f"{args.users} users, {args.showtimes} showtimes, {args.bookings_per_show} bookings/show")
+    print(f"journal_mode: before={before_journal} after={after_journal}")
+    print(f"{'':<32}{'before p50':>12}{'after p50':>12}{'before max':>12}{'after max':>12}")
+    for name in before:
+        b50, bmax = before[name]
+        a50, amax = after[name]
+        print(f"{name:<32}{b50:>10.3f}ms{a50:>10.3f}ms{bmax:>10.2f}ms{amax:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Worker boot-time breakdown, measured in fresh interpreters the way a
+gunicorn worker boots without --preload: import the app package, run
+create_app(), serve a first request (GET /login). Uses app.startup's own
+timings and fails when the median total exceeds the budget.
+
+    python bench_startup.py --runs 5 --budget 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from app.startup import PHASES
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import json, sys
+from app import create_app, startup
+app = create_app()
+app.test_client().get('/login')
+print(json.dumps({'timings': startup.timings, 'pdf_loaded': 'xhtml2pdf' in sys.modules}))
+"""
+
+
+def boot_once(env):
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=float(os.getenv('STARTUP_BUDGET_SECONDS', '3')))
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="sandhika-startup-")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmpdir, 'startup.db')}",
+               OUTBOX_AUTOSTART="0", MAINTENANCE_AUTOSTART="0", AUTO_INIT_DB="0")
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app:create_app()", "init-db"],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+    runs = [boot_once(env) for _ in range(args.runs)]
+    print(f"{'phase':<16}{'median':>10}{'max':>10}")
+    totals = [sum(r['timings'].values()) for r in runs]
+    for phase in PHASES:
+        samples = [r['timings'].get(phase, 0.0) for r in runs]
+        print(f"{phase:<16}{statistics.median(samples):>9.3f}s{max(samples):>9.3f}s")
+    print(f"{'total':<16}{statistics.median(totals):>9.3f}s{max(totals):>9.3f}s")
+    if any(r['pdf_loaded'] for r in runs):
+        print("note: xhtml2pdf was imported during boot")
+
+    if statistics.median(totals) > args.budget:
+        print(f"OVER BUDGET: median {statistics.median(totals):.3f}s > {args.budget:.1f}s")
+        return 1
+    print(f"within the {args.budget:.1f}s budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
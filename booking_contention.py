@@ -0,0 +1,115 @@
+"""
+Contention harness for app.booking_engine.claim_seats.
+
+Fires N concurrent bookings at the same seats of one showtime against a
+throwaway SQLite database and checks that no seat was sold twice.
+
+    python booking_contention.py --threads 32 --seats 2
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date, time as dtime
+
+
+def run(threads, seats_per_booking, rounds):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sandhika-contention-"), "contention.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["OUTBOX_AUTOSTART"] = os.environ["MAINTENANCE_AUTOSTART"] = "0"
+
+    from app import create_app, db
+    from app.models import User, Movie, Showtime, Seat, Booking, BookingSeat
+    from app.booking_engine import claim_seats
+    from app.migrations import init_db
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+        movie = Movie(title="Contention Test", description="-", duration=120)
+        db.session.add(movie)
+        db.session.flush()
+        showtimes = [Showtime(movie_id=movie.id, date=date.today(), time=dtime(18, 0)) for _ in range(rounds)]
+        users = [User(full_name=f"User {i}", email=f"user{i}@example.com", password="x",
+                      role="officer", is_approved=True) for i in range(threads)]
+        db.session.add_all(showtimes + users)
+        db.session.commit()
+        showtime_ids = [s.id for s in showtimes]
+        user_ids = [u.id for u in users]
+        seat_ids = [s.id for s in Seat.query.order_by(Seat.id).limit(seats_per_booking)]
+
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker(user_id, showtime_id, barrier):
+        with app.app_context():
+            barrier.wait()
+            try:
+                result = claim_seats(user_id, showtime_id, seat_ids)
+            except Exception as e:  # surfaced in the report below
+                with lock:
+                    errors.append(repr(e))
+                return
+            finally:
+                db.session.remove()
+            with lock:
+                results.append(result)
+
+    started = time.perf_counter()
+    for showtime_id in showtime_ids:
+        barrier = threading.Barrier(threads)
+        pool = [threading.Thread(target=worker, args=(uid, showtime_id, barrier)) for uid in user_ids]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+    elapsed = time.perf_counter() - started
+
+    # BookingSeat's unique (showtime_id, seat_id) index can never hold a duplicate,
+    # so check what claim_seats could get wrong: seats sold in two bookings
+    # (from Booking.seat_numbers), more than one winner per showtime, a winner
+    # holding other seats than it asked for, and seat rows without a booking.
+    with app.app_context():
+        doubles = wrong_seats = 0
+        owners = {}  # showtime_id -> {seat_id: booking_id}
+        winners = {}
+        for booking_id, showtime_id, seat_numbers in db.session.execute(
+                db.select(Booking.id, Booking.showtime_id, Booking.seat_numbers)):
+            claimed = [int(t) for t in (seat_numbers or "").split(",") if t.strip()]
+            taken = owners.setdefault(showtime_id, {})
+            doubles += sum(1 for seat_id in claimed if seat_id in taken)
+            taken.update((seat_id, booking_id) for seat_id in claimed)
+            winners[showtime_id] = winners.get(showtime_id, 0) + 1
+            wrong_seats += sorted(claimed) != sorted(seat_ids)
+        extra_winners = sum(1 for sid in showtime_ids if winners.get(sid, 0) != 1)
+        orphans = db.session.execute(
+            db.select(db.func.count(BookingSeat.id))
+            .outerjoin(Booking, Booking.id == BookingSeat.booking_id)
+            .where(Booking.id.is_(None))).scalar()
+
+    won = sum(1 for r in results if r.ok)
+    lost = sum(1 for r in results if r.reason == "seats_taken")
+    attempts = threads * rounds
+    print(f"attempts:        {attempts} ({threads} threads x {rounds} showtimes, {seats_per_booking} seats each)")
+    print(f"bookings won:    {won} (expected {rounds})")
+    print(f"conflicts:       {lost}")
+    print(f"errors:          {len(errors)}")
+    for e in errors[:5]:
+        print(f"  {e}")
+    print(f"double-bookings: {doubles}")
+    print(f"showtimes without exactly one booking: {extra_winners}")
+    print(f"bookings with other seats: {wrong_seats}")
+    print(f"orphan seat rows: {orphans}")
+    print(f"throughput:      {attempts / elapsed:.1f} attempts/s ({elapsed:.2f}s)")
+    return (doubles == 0 and extra_winners == 0 and wrong_seats == 0 and orphans == 0
+            and won == rounds and not errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seats", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    raise SystemExit(0 if run(args.threads, args.seats, args.rounds) else 1)
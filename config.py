@@ -5,15 +5,106 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default-key')
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///sandhika.db'
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///sandhika.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    AUTO_INIT_DB = os.getenv('AUTO_INIT_DB') == '1'      # run `flask init-db` work in create_app (dev only)
+    PRELOAD = os.getenv('APP_PRELOAD') == '1'            # set by gunicorn.conf.py; threads start after fork
+    STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', '3'))  # import + create_app + first request
 
-    MAIL_SERVER = 'smtp.gmail.com'
-    MAIL_PORT = 465
-    MAIL_USE_SSL = True
+    # SQLite connection pragmas (app.sqlite_profile), applied on every new connection
+    SQLITE_TUNING = os.getenv('SQLITE_TUNING', '1') == '1'
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-20000'))          # negative = KiB, so ~20 MB
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))
+
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'     # Prometheus text at /metrics
+    QUERY_COUNT_HEADER = os.getenv('QUERY_COUNT_HEADER') == '1'    # add X-Query-Count to responses
+    QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT') == '1'  # fail requests that exceed QUERY_BUDGETS
+    ADMIN_SEATS_DAYS_PER_PAGE = 7   # show dates per page on /admin/seats
+    REPORT_CHUNK_SIZE = 200         # showtimes aggregated per step of the streamed /admin/summary report
+    GUEST_FEE = 50                  # ₹ per guest, paid at the counter
+    SEAT_CACHE_TTL = float(os.getenv('SEAT_CACHE_TTL', '2'))  # seconds before a worker re-reads seat bookings
+    SEAT_GRID_CACHE_SIZE = 256      # rendered booking-page grids per process, one per (showtime, role)
+    IDENTITY_CACHE_TTL = float(os.getenv('IDENTITY_CACHE_TTL', '30'))  # seconds a worker trusts a cached login user
+    IDENTITY_CACHE_SIZE = 4096      # cached login users per process
+
+    # Live seat streams on the booking page (app.seat_events); each open stream holds a worker thread
+    SEAT_STREAM_MAX_CLIENTS = int(os.getenv('SEAT_STREAM_MAX_CLIENTS', '24'))  # per process, below gunicorn --threads
+    SEAT_STREAM_MAX_SECONDS = 300   # close and let the browser reconnect, freeing the thread
+    SEAT_STREAM_HEARTBEAT = 15      # seconds between keep-alive comments
+    SEAT_STREAM_RETRY_MS = 3000     # browser reconnect delay
+    SEAT_STREAM_QUEUE_SIZE = 64     # pending events per client before it is resynced with a snapshot
+
+    # Seat holds (app.seat_holds): clicking a seat sets it aside while the user books
+    SEAT_HOLD_SECONDS = int(os.getenv('SEAT_HOLD_SECONDS', '180'))
+    SEAT_HOLD_MAX_PER_USER = 10     # per showtime
+    SEAT_HOLD_SWEEP_INTERVAL = 60   # seconds between range deletes of expired holds
+
+    # Waiting room for booking surges (app.admission); queue state is shared through a local SQLite file
+    ADMISSION_QUEUE_ENABLED = os.getenv('ADMISSION_QUEUE_ENABLED') == '1'
+    ADMISSION_RATE = float(os.getenv('ADMISSION_RATE', '5'))   # bookers let in per second, per showtime; must be > 0
+    ADMISSION_WINDOW_SECONDS = 600  # how long an admitted user may keep booking before queueing again
+    ADMISSION_STORE = os.getenv('ADMISSION_STORE')  # defaults to <instance>/admission.db
+
+    # Proxies in front of gunicorn that append to X-Forwarded-For; werkzeug's ProxyFix takes the
+    # client address from that many hops back. The Procfile deploy sits behind one PaaS router;
+    # set 0 when clients connect to gunicorn directly, or anyone could spoof their address.
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '1'))
+
+    # Auth endpoint limits (app.rate_limit): scope -> (requests, seconds), sliding window
+    # 'ip' is request.remote_addr, the client's address once TRUSTED_PROXY_HOPS is right
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE')  # defaults to <instance>/rate_limit.db
+    RATE_LIMIT_LOGIN = {'ip': (20, 300), 'email': (10, 300)}
+    RATE_LIMIT_OTP = {'ip': (10, 3600), 'email': (3, 900)}        # send-otp and forgot-password
+    RATE_LIMIT_OTP_VERIFY = {'ip': (10, 300)}                      # OTP guesses
+    RATE_LIMIT_TEST_EMAIL = {'ip': (2, 60)}
+
+    # Background maintenance (app.maintenance); one worker per host wins the lock and runs the jobs
+    MAINTENANCE_AUTOSTART = os.getenv('MAINTENANCE_AUTOSTART', '1') == '1'
+    MAINTENANCE_LOCK_FILE = os.getenv('MAINTENANCE_LOCK_FILE')  # defaults to <instance>/maintenance.lock
+    MAINTENANCE_TICK = 60               # seconds between checks for due jobs
+    MAINTENANCE_PURGE_INTERVAL = 900    # seconds between purges of expired OTPs, holds and rate limits
+    MAINTENANCE_WINDOW_HOURS = (2, 5)   # local hours [start, end) for ANALYZE and the daily purges
+    MAINTENANCE_BATCH_SIZE = 500        # rows per DELETE
+    MAINTENANCE_BATCH_PAUSE = 0.05      # seconds between batches, so bookings get the write lock
+    MAINTENANCE_VACUUM_PAGES = 1000     # pages per incremental_vacuum (init_db turns on auto_vacuum=INCREMENTAL)
+    MAINTENANCE_KEEP_SENT_EMAIL_DAYS = 30
+    MAINTENANCE_KEEP_RUNS_DAYS = 30
+
+    # Password hashing (app.passwords); hashes on an older method are upgraded at the owner's next login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')  # Werkzeug's default; ~32 MB per hash
+    PASSWORD_HASH_TARGET_MS = int(os.getenv('PASSWORD_HASH_TARGET_MS', '100'))    # for `flask passwords calibrate`
+
+    # Rendered ticket PDFs (app.pdf_cache); defaults to <instance>/pdf_cache
+    PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR')
+    PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+    PDF_CACHE_MAX_AGE = 0           # browsers revalidate with If-None-Match every time
+
+    # Bulk ticket runs (app.tickets); files kept in TICKET_BATCH_DIR, default <instance>/ticket_batches
+    TICKET_BATCH_DIR = os.getenv('TICKET_BATCH_DIR')
+    # Renderer processes per web worker, capped by the CPUs it may use (affinity, cgroup quota); 0 or 1 renders in-thread
+    TICKET_BATCH_WORKERS = int(os.getenv('TICKET_BATCH_WORKERS', '2'))
+    TICKET_BATCH_POOL_IDLE = 60         # seconds after the last run before the renderer processes exit
+    TICKET_BATCH_KEEP_SECONDS = 3600    # finished runs are pruned when a new one starts
+
+    MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+    MAIL_PORT = int(os.getenv('MAIL_PORT', '465'))
+    MAIL_USE_SSL = os.getenv('MAIL_USE_SSL', '1') == '1'
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_USERNAME')  # Important
+
+    # Email outbox (app.outbox): background sender pool and retry policy
+    OUTBOX_AUTOSTART = os.getenv('OUTBOX_AUTOSTART', '1') == '1'
+    OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', '2'))
+    OUTBOX_BATCH_SIZE = 20          # messages per SMTP connection
+    OUTBOX_MAX_ATTEMPTS = 5
+    OUTBOX_RETRY_BASE = 2.0         # seconds, doubled on every failed attempt
+    OUTBOX_POLL_INTERVAL = 5.0      # seconds between outbox scans when idle
+
     ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME')
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD')
     
@@ -1,7 +1,7 @@
-from app import create_app, db
-from app.models import *  # Import all models so tables are created
+from app import create_app
+from app.migrations import init_db
 
 app = create_app()
 
 with app.app_context():
-    db.create_all()
+    init_db()
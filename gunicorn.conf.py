@@ -0,0 +1,32 @@
+# gunicorn settings for the Procfile: gunicorn -c gunicorn.conf.py "app:create_app()"
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '3'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '32'))  # live seat streams each hold one
+
+# Import the app once in the master and fork workers from it: workers boot
+# in milliseconds and share the imported code pages copy-on-write.
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+if preload_app:
+    os.environ['APP_PRELOAD'] = '1'  # create_app leaves background threads to post_fork
+
+
+def when_ready(server):
+    # Move everything the master built into the permanent generation so the
+    # collector in each worker never writes to (and so copies) those pages.
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    from app import db, start_background_services
+    app = worker.app.wsgi()
+    with app.app_context():
+        # Never share the master's pooled SQLite connections across processes
+        db.engine.dispose(close=False)
+    start_background_services(app)
@@ -1,10 +1,11 @@
 
-from app import create_app, db  # ✅ Make sure db is imported
+from app import create_app
+from app.migrations import init_db
 from flask import Flask
 
 app = create_app()
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()  # ✅ Now db is defined and can be used
+        init_db()  # tables, indexes and seats; same as `flask init-db`
     app.run(debug=True)
@@ -1,26 +1,33 @@
 from app.models import db, Seat
 
-def seed_seats_if_empty():
-    if Seat.query.first():
-        return
+# (restriction, rows); every row holds seats 1..SEATS_PER_ROW
+SEAT_LAYOUT = (
+    ('Junior Sailor', 'ABCDEF'),  # 60 seats
+    ('Senior Sailor', 'GHIJ'),    # 40 seats
+    ('Officer', 'KLM'),           # 30 seats
+)
+SEATS_PER_ROW = 10
 
-    seats = []
 
-    # Junior Sailors: A-F (60 seats)
-    for row in ['A', 'B', 'C', 'D', 'E', 'F']:
-        for num in range(1, 11):
-            seats.append(Seat(label=f"{row}{num}", restricted='Junior Sailor'))
+def seat_layout_rows():
+    return [{'label': f"{row}{num}", 'restricted': restricted}
+            for restricted, rows in SEAT_LAYOUT
+            for row in rows
+            for num in range(1, SEATS_PER_ROW + 1)]
 
-    # Senior Sailors: G-J (40 seats)
-    for row in ['G', 'H', 'I', 'J']:
-        for num in range(1, 11):
-            seats.append(Seat(label=f"{row}{num}", restricted='Senior Sailor'))
 
-    # Officers: K-M (30 seats)
-    for row in ['K', 'L', 'M']:
-        for num in range(1, 11):
-            seats.append(Seat(label=f"{row}{num}", restricted='Officer'))
-
-    db.session.bulk_save_objects(seats)
+def seed_seat_layout():
+    """Insert every layout seat that is missing in one executemany; returns the number added."""
+    existing = {label for (label,) in db.session.query(Seat.label)}
+    rows = [r for r in seat_layout_rows() if r['label'] not in existing]
+    if rows:
+        db.session.execute(Seat.__table__.insert(), rows)
     db.session.commit()
+    return len(rows)
+
+
+def seed_seats_if_empty():
+    if Seat.query.first():
+        return
+    seed_seat_layout()
     print("✅ Seats seeded.")
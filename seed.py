@@ -1,13 +1,20 @@
+from datetime import date, time
 
-from app import create_app, db, Movie, Showtime
+from app import create_app, db
+from app.models import Movie, Showtime
+from app.migrations import init_db
+
+# One movie and one showtime for a quick manual check. For realistic volumes
+# use the bulk loaders instead:  flask --app app:create_app seed all
 
 app = create_app()
 with app.app_context():
-    movie = Movie(title="Top Gun", description="Action movie")
+    init_db()
+    movie = Movie(title="Top Gun", description="Action movie", duration=110)
     db.session.add(movie)
     db.session.commit()
 
-    showtime = Showtime(movie_id=movie.id, time="18:00")
+    showtime = Showtime(movie_id=movie.id, date=date.today(), time=time(18, 0))
     db.session.add(showtime)
     db.session.commit()
     print("Seeded movie and showtime.")
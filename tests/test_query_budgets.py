@@ -0,0 +1,99 @@
+"""
+Every endpoint in QUERY_BUDGETS, run against a seeded database with
+QUERY_BUDGET_STRICT on: an N+1 regression fails here instead of only
+logging a warning in production.
+
+    python -m pytest -q tests
+"""
+import os
+from datetime import date
+
+import pytest
+
+from config import Config
+
+USERS, SHOWTIMES, BOOKINGS = 60, 30, 600  # enough bookings per user and showtime for an N+1 to show
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    tmpdir = tmp_path_factory.mktemp("query-budgets")
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmpdir, 'test.db')}"
+        PDF_CACHE_DIR = os.path.join(tmpdir, "pdf_cache")
+        RATE_LIMIT_STORE = os.path.join(tmpdir, "rate_limit.db")
+        ADMISSION_STORE = os.path.join(tmpdir, "admission.db")
+        OUTBOX_AUTOSTART = False
+        MAINTENANCE_AUTOSTART = False
+        QUERY_BUDGET_STRICT = True
+        TESTING = True
+
+    from app import create_app
+    from app.migrations import init_db
+    from app.synthetic import seed_synthetic
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        init_db()
+        seed_synthetic(users=USERS, showtimes=SHOWTIMES, bookings=BOOKINGS, seed=3)
+    return app
+
+
+@pytest.fixture(scope="module")
+def sample(app):
+    """A user with the most bookings, one of their bookings, and an upcoming showtime."""
+    from app import db
+    from app.models import Booking, BookingSeat, Showtime, User
+    from app.seat_catalog import get_seat_catalog
+
+    with app.app_context():
+        user_id, booking_id = db.session.execute(
+            db.select(Booking.user_id, db.func.max(Booking.id))
+            .group_by(Booking.user_id).order_by(db.func.count().desc()).limit(1)).one()
+        showtime = (Showtime.query.filter(Showtime.date >= date.today())
+                    .order_by(Showtime.date, Showtime.time).first())
+        catalog = get_seat_catalog()
+        role = db.session.get(User, user_id).role
+        taken = set(db.session.scalars(db.select(BookingSeat.seat_id).where(BookingSeat.showtime_id == showtime.id)))
+        free = [s.id for s in catalog if catalog.is_eligible(role, s.id) and s.id not in taken]
+        return {"user_id": user_id, "booking_id": booking_id, "showtime_id": showtime.id,
+                "movie_id": showtime.movie_id, "seat_ids": [str(sid) for sid in free[:2]]}
+
+
+def _requests(s):
+    return {
+        "user.dashboard": [("GET", "/user/dashboard", {})],
+        "user.book_tickets": [
+            ("GET", f"/user/book?movie_id={s['movie_id']}&showtime_id={s['showtime_id']}", {}),
+            ("POST", "/user/book", {"data": {"showtime_id": s["showtime_id"], "seat_ids": s["seat_ids"],
+                                             "self_count": 1}}),
+        ],
+        "user.my_bookings": [("GET", "/user/my-bookings", {})],
+        "user.download_ticket": [("GET", f"/user/download-ticket/{s['booking_id']}", {})],
+        "user.get_showtimes": [("GET", f"/user/get_showtimes/{s['movie_id']}", {})],
+        "user.seat_availability_api": [("GET", f"/user/api/showtimes/{s['showtime_id']}/availability", {})],
+    }
+
+
+def test_every_budget_is_exercised(sample):
+    from app.query_counter import QUERY_BUDGETS
+
+    assert set(_requests(sample)) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("endpoint", sorted(_requests({"movie_id": 0, "showtime_id": 0, "booking_id": 0, "seat_ids": []})))
+def test_endpoint_within_query_budget(app, sample, endpoint):
+    from app.query_counter import QUERY_BUDGETS, count_queries
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(sample["user_id"])
+        sess["_fresh"] = True
+    for method, url, kwargs in _requests(sample)[endpoint]:
+        with count_queries() as stats:
+            resp = client.open(url, method=method, **kwargs)
+            resp.get_data()
+        assert resp.status_code < 400, (method, url, resp.status_code)
+        assert stats.count <= QUERY_BUDGETS[endpoint], \
+            f"{method} {url} ran {stats.count} queries (budget {QUERY_BUDGETS[endpoint]})"